@@ -0,0 +1,106 @@
+# Benchmark of the shortest-path solver engines.
+# Times every engine in solvers.SOLVERS against networkx over a sweep of graph sizes and densities,
+# and checks that all of them agree on the shortest path length.
+#
+# Usage:
+#   python benchmark.py
+#   python benchmark.py --sizes 1000 10000 100000 --densities 0.5 1 2 --queries 20
+#   python benchmark.py --layout grid
+import argparse  # Library for reading command-line options
+import random  # Library for generating random numbers
+import time  # Timing of each engine
+
+import engine  # Level generation
+import layout  # Node positions for the A* heuristic
+import solvers  # The solver engines being measured
+
+LAYOUT_SIZE = 1000  # Width and height the benchmark layouts are computed for
+
+
+def layout_positions(kind):
+    """Returns a positions_fn for run_benchmark that lays graphs out with the named layout."""
+    return lambda graph: layout.compute_layout(graph, LAYOUT_SIZE, LAYOUT_SIZE, kind, seed=0)
+
+
+def time_engine(run, queries):
+    """
+    Runs a solver on every (source, target) query.
+    Returns:
+        A tuple (seconds per query, list of path lengths).
+    """
+    start = time.perf_counter()
+    lengths = [run(source, target) for source, target in queries]
+    return (time.perf_counter() - start) / len(queries), lengths
+
+
+def run_benchmark(sizes, densities, queries_per_graph, seed, positions_fn=None):
+    """
+    Times every engine over every combination of graph size and density.
+    Parameters:
+        sizes: Numbers of nodes to test.
+        densities: Extra edges per node added on top of the spanning tree.
+        queries_per_graph: Number of random (source, target) pairs timed on every graph.
+        seed: Seed for the graphs and queries.
+        positions_fn: Function returning node positions for a graph, used by A*. Defaults to the force-directed
+            layout, which places connected nodes close together like the game does for large levels.
+    Returns:
+        A list of result rows (size, density, engine, milliseconds per query).
+    Raises:
+        AssertionError: If an engine disagrees with networkx about a path length.
+    """
+    import networkx as nx  # Only needed for the baseline
+
+    rng = random.Random(seed)
+    positions_fn = positions_fn or layout_positions("force")
+    rows = []
+    for size in sizes:
+        for density in densities:
+            graph = engine.generate_level_graph(0, seed=rng.randrange(2 ** 32), nodes_count=size,
+                                                extra_edges=int(size * density))
+            positions = positions_fn(graph)
+            queries = [tuple(rng.sample(range(size), 2)) for _ in range(queries_per_graph)]
+
+            nx_graph = graph.to_networkx()
+            baseline_time, expected = time_engine(
+                lambda s, t: nx.shortest_path_length(nx_graph, s, t, weight="weight"), queries)
+            rows.append((size, density, "networkx", baseline_time * 1000))
+
+            for name, solver in solvers.SOLVERS.items():
+                # One untimed query: per-layout setup (the A* heuristic) is done once per level, not per query
+                solver(graph, *queries[0], positions)
+                seconds, lengths = time_engine(lambda s, t: solver(graph, s, t, positions)[1], queries)
+                if lengths != expected:
+                    raise AssertionError(f"{name} disagrees with networkx on {size} nodes, density {density}")
+                rows.append((size, density, name, seconds * 1000))
+    return rows
+
+
+def print_table(rows):
+    """Prints the results, with each engine's speed-up over networkx."""
+    print(f"{'nodes':>8} {'density':>8} {'engine':>14} {'ms/query':>10} {'speed-up':>9}")
+    baseline = {}
+    for size, density, name, ms in rows:
+        if name == "networkx":
+            baseline[size, density] = ms
+        print(f"{size:>8} {density:>8} {name:>14} {ms:>10.3f} {baseline[size, density] / ms:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shortest-path solver engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000],
+                        help="numbers of nodes to test")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.5, 1.0, 3.0],
+                        help="extra edges per node on top of the spanning tree")
+    parser.add_argument("--queries", type=int, default=10, help="random start/end pairs timed per graph")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the graphs and queries")
+    parser.add_argument("--layout", choices=sorted(layout.LAYOUTS), default="force",
+                        help="layout giving the node positions A* is guided by (default: force)")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.densities, args.queries, args.seed, layout_positions(args.layout))
+    print_table(rows)
+    print("All engines agree with networkx on every path length.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Pan and zoom camera for the game board.
+# Node positions from the layouts are world coordinates; the camera maps them to the screen with
+# screen = (world - offset) * zoom, and back again for mouse input. It has no pygame dependency.
+import numpy as np  # Library for fast array operations
+
+
+class Camera:
+    """
+    A view onto the board: `offset` is the world point shown at the top-left corner of the screen
+    and `zoom` the number of screen pixels per world unit.
+    """
+
+    def __init__(self, min_zoom=0.5, max_zoom=8.0):
+        """
+        Parameters:
+            min_zoom, max_zoom: The range the zoom is kept in.
+        """
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.reset()
+
+    def reset(self):
+        """Shows the board as laid out: world coordinates equal screen coordinates."""
+        self.offset = (0.0, 0.0)
+        self.zoom = 1.0
+
+    def to_screen(self, points):
+        """
+        Converts world positions to screen positions.
+        Parameters:
+            points: (n, 2) array of world positions.
+        Returns:
+            An (n, 2) integer array of screen positions.
+        """
+        points = np.asarray(points, dtype=float)
+        return np.rint((points - self.offset) * self.zoom).astype(np.int64)
+
+    def to_world(self, point):
+        """Converts a screen position (e.g. the mouse) to a world position (x, y)."""
+        return point[0] / self.zoom + self.offset[0], point[1] / self.zoom + self.offset[1]
+
+    def world_rect(self, width, height, margin=0):
+        """
+        Returns the world rectangle (left, top, right, bottom) visible on a screen of the given size.
+        Parameters:
+            width, height: The screen dimensions.
+            margin: Extra screen pixels to include on every side, for things drawn around a position.
+        """
+        left, top = self.to_world((-margin, -margin))
+        right, bottom = self.to_world((width + margin, height + margin))
+        return left, top, right, bottom
+
+    def pan(self, dx, dy):
+        """Moves the view by (dx, dy) screen pixels; the board follows the mouse when dragged."""
+        self.offset = (self.offset[0] - dx / self.zoom, self.offset[1] - dy / self.zoom)
+
+    def zoom_at(self, point, factor):
+        """
+        Zooms by `factor`, keeping the world position under the screen point where it is.
+        Returns:
+            True if the zoom changed (it is clamped to the camera's range).
+        """
+        zoom = min(max(self.zoom * factor, self.min_zoom), self.max_zoom)
+        if zoom == self.zoom:
+            return False
+        anchor_x, anchor_y = self.to_world(point)
+        self.zoom = zoom
+        self.offset = (anchor_x - point[0] / zoom, anchor_y - point[1] / zoom)
+        return True
@@ -0,0 +1,212 @@
+# Compact array-backed graph used by the game's level pipeline.
+# Nodes are the integers 0..n-1, every undirected edge has an integer id, and all edge data lives in
+# contiguous NumPy arrays instead of per-edge attribute dicts, so large levels stay small in memory.
+import numpy as np  # Library for fast array operations
+
+
+class CompactGraph:
+    """
+    Undirected weighted graph stored in compressed sparse row (CSR) form.
+    Attributes:
+        edge_u, edge_v: int32 arrays with the two end nodes of every edge (edge_u < edge_v).
+        weights: int32 array with the weight of every edge, indexed by edge id.
+        indptr: The neighbors of node u are indices[indptr[u]:indptr[u + 1]].
+        indices: int32 array with the neighbor of every adjacency slot; every row is sorted.
+        slot_edges: int32 array with the edge id of every adjacency slot.
+        slot_weights: int32 array with the weight of every adjacency slot, kept in sync by set_weight().
+        version: Counts the weight changes made with set_weight(), so cached data derived from the weights
+            can tell when it is stale.
+    """
+
+    def __init__(self, node_count, edge_u, edge_v, weights):
+        """
+        Builds the graph from parallel edge arrays.
+        Parameters:
+            node_count: The number of nodes; nodes are numbered 0..node_count-1.
+            edge_u, edge_v: The two end nodes of every edge, in any order.
+            weights: The weight of every edge.
+        """
+        edge_u = np.asarray(edge_u, dtype=np.int32)
+        edge_v = np.asarray(edge_v, dtype=np.int32)
+        self.node_count = int(node_count)
+        # Store every edge with the smaller node first so (u, v) and (v, u) mean the same edge
+        self.edge_u = np.minimum(edge_u, edge_v)
+        self.edge_v = np.maximum(edge_u, edge_v)
+        self.weights = np.ascontiguousarray(weights, dtype=np.int32)
+        if len(self.edge_u) and (self.edge_u.min() < 0 or self.edge_v.max() >= self.node_count):
+            raise ValueError("edge end nodes must be in the range 0..node_count-1")
+        if np.any(self.edge_u == self.edge_v):
+            raise ValueError("self-loops are not supported")
+
+        # Every edge appears twice in the adjacency, once from each end node
+        sources = np.concatenate([self.edge_u, self.edge_v])
+        targets = np.concatenate([self.edge_v, self.edge_u])
+        slot_edges = np.concatenate([np.arange(len(self.edge_u), dtype=np.int32)] * 2)
+        order = np.lexsort((targets, sources))  # Group slots by source node, neighbors sorted
+        self.indices = targets[order]
+        self.slot_edges = slot_edges[order]
+        self.indptr = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.node_count), out=self.indptr[1:])
+        self.slot_weights = self.weights[self.slot_edges]  # Rows read their weights without a gather
+        self.version = 0
+
+        # Sorted edge keys (u * n + v) answer vectorized edge lookups and find duplicate edges
+        keys = self.edge_u.astype(np.int64) * self.node_count + self.edge_v
+        self._key_order = np.argsort(keys)
+        self._sorted_keys = keys[self._key_order]
+        if np.any(self._sorted_keys[1:] == self._sorted_keys[:-1]):
+            raise ValueError("duplicate edges are not supported")
+
+    @classmethod
+    def from_networkx(cls, graph, weight="weight"):
+        """
+        Converts a networkx graph whose nodes are the integers 0..n-1.
+        Parameters:
+            graph: The networkx graph to convert.
+            weight: The edge attribute holding the weight.
+        Returns:
+            A CompactGraph with the same edges and weights.
+        """
+        node_count = graph.number_of_nodes()
+        if set(graph.nodes) != set(range(node_count)):
+            raise ValueError("graph nodes must be the integers 0..n-1")
+        edges = list(graph.edges(data=weight, default=1))
+        edge_u = [u for u, _, _ in edges]
+        edge_v = [v for _, v, _ in edges]
+        weights = [w for _, _, w in edges]
+        return cls(node_count, edge_u, edge_v, weights)
+
+    def to_networkx(self):
+        """
+        Converts the graph to a networkx graph with a 'weight' attribute on every edge.
+        """
+        import networkx as nx  # Only needed for the conversion
+
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.node_count))
+        graph.add_weighted_edges_from(zip(self.edge_u.tolist(), self.edge_v.tolist(), self.weights.tolist()))
+        return graph
+
+    def __len__(self):
+        return self.node_count
+
+    def __iter__(self):
+        return iter(range(self.node_count))
+
+    @property
+    def nodes(self):
+        """The nodes of the graph, as a range."""
+        return range(self.node_count)
+
+    @property
+    def edges(self):
+        """The edges of the graph as a list of (u, v) pairs with u < v, in edge id order."""
+        return list(zip(self.edge_u.tolist(), self.edge_v.tolist()))
+
+    def number_of_nodes(self):
+        return self.node_count
+
+    def number_of_edges(self):
+        return len(self.edge_u)
+
+    def _slot(self, u, v):
+        """Returns the adjacency slot of v in the row of u, or -1 if the nodes are not connected."""
+        first, last = self.indptr[u], self.indptr[u + 1]
+        slot = first + int(np.searchsorted(self.indices[first:last], v))  # Rows are sorted by neighbor
+        if slot < last and self.indices[slot] == v:
+            return int(slot)
+        return -1
+
+    def edge_id(self, u, v):
+        """
+        Returns the id of the edge between u and v, or -1 if the nodes are not connected.
+        The lookup is a binary search in the row of u, so it takes O(log degree) time and no extra memory.
+        """
+        slot = self._slot(u, v)
+        return int(self.slot_edges[slot]) if slot >= 0 else -1
+
+    def edge_ids(self, us, vs):
+        """
+        Vectorized edge lookup.
+        Parameters:
+            us, vs: Arrays of end nodes.
+        Returns:
+            An int64 array with the edge id of every pair, or -1 where the nodes are not connected.
+        """
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        keys = np.minimum(us, vs) * self.node_count + np.maximum(us, vs)
+        if len(self._sorted_keys) == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        found = np.searchsorted(self._sorted_keys, keys)
+        found = np.minimum(found, len(self._sorted_keys) - 1)
+        ids = self._key_order[found].astype(np.int64)
+        return np.where(self._sorted_keys[found] == keys, ids, -1)
+
+    def has_edge(self, u, v):
+        """Returns True if u and v are connected."""
+        return self.edge_id(u, v) >= 0
+
+    def weight(self, u, v):
+        """
+        Returns the weight of the edge between u and v.
+        Raises:
+            KeyError: If the nodes are not connected.
+        """
+        edge = self.edge_id(u, v)
+        if edge < 0:
+            raise KeyError((u, v))
+        return int(self.weights[edge])
+
+    def neighbors(self, u):
+        """Returns an array with the neighbors of u."""
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def neighbor_weights(self, u):
+        """Returns an array with the weights of the edges leaving u, aligned with neighbors(u)."""
+        return self.slot_weights[self.indptr[u]:self.indptr[u + 1]]
+
+    def degree(self, u):
+        """Returns the number of neighbors of u."""
+        return int(self.indptr[u + 1] - self.indptr[u])
+
+    def row(self, u):
+        """
+        Returns the neighbors of u and the weights of the edges to them, as two Python lists.
+        Useful for searches that only visit a small part of the graph, where building lists for every node
+        (see flat_adjacency) would cost more than the search itself.
+        """
+        first, last = self.indptr[u], self.indptr[u + 1]
+        return self.indices[first:last].tolist(), self.slot_weights[first:last].tolist()
+
+    def flat_adjacency(self):
+        """
+        Returns the adjacency as three flat Python lists (indptr, neighbors, weights): the neighbors of u are
+        neighbors[indptr[u]:indptr[u + 1]] and weights holds the weight of every such slot.
+        Useful for searches that visit the whole graph, such as solvers.shortest_path_tree(), where indexing
+        NumPy scalars in the loop would be slow. The lists are built on every call and not kept, so a graph
+        never holds per-edge Python objects.
+        """
+        return self.indptr.tolist(), self.indices.tolist(), self.slot_weights.tolist()
+
+    def set_weight(self, u, v, weight):
+        """
+        Changes the weight of the edge between u and v in place.
+        Returns:
+            The previous weight.
+        Raises:
+            KeyError: If the nodes are not connected.
+        """
+        slot = self._slot(u, v)
+        if slot < 0:
+            raise KeyError((u, v))
+        edge = int(self.slot_edges[slot])
+        old = int(self.weights[edge])
+        self.weights[edge] = weight
+        self.slot_weights[slot] = self.slot_weights[self._slot(v, u)] = weight  # The edge's slot in both rows
+        self.version += 1
+        return old
+
+    def copy(self):
+        """Returns an independent copy of the graph, e.g. before changing the weights of a shared level."""
+        return CompactGraph(self.node_count, self.edge_u, self.edge_v, self.weights.copy())
@@ -0,0 +1,206 @@
+# Difficulty grading of generated levels.
+# Levels of the same size can differ a lot in how hard they are, so every candidate level is graded by
+# the shape of its solution space: how many simple paths the Finish check accepts, how close the next best
+# (losing) paths are, and how many hops the shortest path takes. Grading runs in a process pool, so thousands
+# of candidates can be graded and only those inside a target difficulty band kept.
+#
+# Usage:
+#   python difficulty.py --level 3 --candidates 5000
+#   python difficulty.py --nodes 30 --candidates 20000 --band 6 12 --pack graded.pack
+import argparse  # Library for reading command-line options
+import heapq  # Priority queue for the best-first path enumeration
+import random  # Library for generating random numbers
+import time  # Timing of the grading run
+from collections import namedtuple  # Lightweight record type for grades
+from concurrent.futures import ProcessPoolExecutor  # Grades candidates on every core
+
+import numpy as np  # Library for fast array operations
+
+import engine  # Level generation and the scoring tolerance
+from solvers import shortest_path_tree  # Exact distances to the end node, used to prune the enumeration
+
+K_PATHS = 5  # Number of shortest simple paths whose gaps are measured
+EXPANSION_LIMIT = 20000  # Partial paths explored per level before the enumeration gives up
+GRADED_ATTEMPTS = 50  # Candidates tried per level by generate_graded_level
+
+# Grade of one level:
+#   shortest: the shortest path length;  hops: the number of edges on a shortest path
+#   near_optimal: the number of simple paths the Finish check accepts (within WIN_TOLERANCE)
+#   gaps: how much longer the 2nd..K_PATHS-th shortest simple paths are than the shortest one
+#   difficulty: a single score combining the above (see difficulty_score)
+Grade = namedtuple("Grade", ["level", "seed", "nodes", "shortest", "hops", "near_optimal", "gaps", "difficulty"])
+
+
+def ranked_paths(graph, start, end, distance, limit=EXPANSION_LIMIT):
+    """
+    Enumerates the simple paths from start to end in order of increasing weight.
+    The search is best-first over partial paths, ordered by their weight plus the exact distance still to go
+    (ignoring the nodes already used), so complete paths come out shortest first and partial paths that
+    cannot beat the paths asked for are never extended.
+    Parameters:
+        graph: The CompactGraph to search.
+        start, end: The path endpoints.
+        distance: Distance from every node to `end`, as returned by solvers.shortest_path_tree(graph, end).
+        limit: Maximum number of partial paths to extend; the enumeration stops early when it is reached.
+    Yields:
+        (weight, hops) of every simple path, shortest first.
+    """
+    indptr, neighbors, weights = graph.flat_adjacency()
+    distance = distance.tolist()
+    if distance[start] < 0:
+        return
+    # Entries are (weight + distance to go, weight, hops, node, bit mask of the nodes on the path)
+    queue = [(distance[start], 0, 0, start, 1 << start)]
+    expanded = 0
+    while queue and expanded < limit:
+        _, weight, hops, node, used = heapq.heappop(queue)
+        if node == end:
+            yield weight, hops
+            continue
+        expanded += 1
+        for slot in range(indptr[node], indptr[node + 1]):
+            neighbor = neighbors[slot]
+            if not used >> neighbor & 1 and distance[neighbor] >= 0:
+                new_weight = weight + weights[slot]
+                heapq.heappush(queue, (new_weight + distance[neighbor], new_weight, hops + 1, neighbor,
+                                       used | 1 << neighbor))
+
+
+def difficulty_score(hops, near_optimal, gaps):
+    """
+    Combines the metrics into one number; higher is harder.
+    Long solutions are harder to find, several accepted paths make the level easier, and losing paths only
+    slightly longer than the shortest one are decoys: each adds 1 / gap.
+    """
+    decoys = sum(1.0 / gap for gap in gaps if gap > engine.WIN_TOLERANCE)
+    return hops * (1.0 + decoys) / max(near_optimal, 1)
+
+
+def grade_level(generated, k=K_PATHS, limit=EXPANSION_LIMIT):
+    """
+    Computes the difficulty metrics of a level.
+    Parameters:
+        generated: An engine.Level.
+        k: Number of shortest simple paths whose gaps are measured.
+        limit: Expansion limit for the path enumeration; on very large levels the counts are lower bounds.
+    Returns:
+        A Grade.
+    """
+    graph = generated.graph
+    distance, _ = shortest_path_tree(graph, generated.end_node)
+    shortest = int(distance[generated.start_node])
+    bound = shortest + engine.WIN_TOLERANCE
+    weights, hops, near_optimal = [], 0, 0
+    for weight, path_hops in ranked_paths(graph, generated.start_node, generated.end_node, distance, limit):
+        if not weights:
+            hops = path_hops  # The first path is a shortest one
+        if len(weights) < k:
+            weights.append(weight)
+        near_optimal += weight <= bound
+        if len(weights) >= k and weight > bound:
+            break
+    gaps = tuple(weight - shortest for weight in weights[1:])
+    return Grade(generated.level, generated.seed, graph.number_of_nodes(), shortest, hops, near_optimal, gaps,
+                 difficulty_score(hops, near_optimal, gaps))
+
+
+def grade_seed(level, seed, nodes_count=None):
+    """Generates the level for a seed and grades it. Runs in a worker process."""
+    return grade_level(engine.generate_level(level, seed, nodes_count))
+
+
+def grade_candidates(count, level=1, base_seed=0, nodes_count=None, executor=None, chunksize=64):
+    """
+    Generates and grades `count` candidate levels across all cores.
+    Candidate i uses the seed engine.level_seed(base_seed, i), so every candidate can be regenerated.
+    Parameters:
+        count: Number of candidates.
+        level: Level number the candidates are generated for.
+        base_seed: Seed the candidate seeds are derived from.
+        nodes_count: Optional number of nodes, overriding the level-based size.
+        executor: Optional executor to use; a ProcessPoolExecutor with one process per CPU when None.
+        chunksize: Candidates sent to a worker at a time; small levels grade in microseconds, so batching
+            keeps the inter-process overhead down.
+    Returns:
+        A list of Grades, in candidate order.
+    """
+    seeds = [engine.level_seed(base_seed, i) for i in range(count)]
+    owns_executor = executor is None
+    executor = executor or ProcessPoolExecutor()
+    try:
+        return list(executor.map(grade_seed, [level] * count, seeds, [nodes_count] * count, chunksize=chunksize))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+
+def in_band(grades, low, high):
+    """Returns the grades whose difficulty lies within [low, high]."""
+    return [grade for grade in grades if low <= grade.difficulty <= high]
+
+
+def generate_graded_level(level, seed=None, nodes_count=None, band=None, attempts=GRADED_ATTEMPTS):
+    """
+    Generates a level whose difficulty lies inside a band, for use behind the level pre-generation.
+    Candidates are generated from seeds derived from `seed` until one fits, so the result is reproducible.
+    Parameters:
+        level: The level number.
+        seed: The level's seed; a random one is picked when it is None.
+        nodes_count: Optional number of nodes, overriding the level-based size.
+        band: (low, high) difficulty range, or None to accept the first candidate.
+        attempts: Maximum number of candidates; when none fits, the one closest to the band is returned.
+    Returns:
+        An engine.Level.
+    """
+    if band is None:
+        return engine.generate_level(level, seed, nodes_count)
+    if seed is None:
+        seed = random.randrange(2 ** 32)  # Pick a seed so the level can still be reproduced later
+    low, high = band
+    best, best_miss = None, None
+    for attempt in range(attempts):
+        candidate = engine.generate_level(level, engine.level_seed(seed, attempt), nodes_count)
+        score = grade_level(candidate).difficulty
+        miss = max(low - score, score - high, 0)
+        if best is None or miss < best_miss:
+            best, best_miss = candidate, miss
+        if miss == 0:
+            break
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade generated levels by difficulty")
+    parser.add_argument("--level", type=int, default=1, help="level number the candidates are generated for")
+    parser.add_argument("--nodes", type=int, default=None, help="number of nodes (default: the level's size)")
+    parser.add_argument("--candidates", type=int, default=1000, help="number of candidate levels to grade")
+    parser.add_argument("--seed", type=int, default=0, help="seed the candidate seeds are derived from")
+    parser.add_argument("--band", type=float, nargs=2, metavar=("LOW", "HIGH"), default=None,
+                        help="keep only candidates with a difficulty in this range")
+    parser.add_argument("--workers", type=int, default=None, help="grading processes (default: CPUs)")
+    parser.add_argument("--pack", default=None, help="write the kept candidates to this level pack")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        grades = grade_candidates(args.candidates, args.level, args.seed, args.nodes, executor)
+    elapsed = time.perf_counter() - started
+    print(f"{len(grades)} candidates graded in {elapsed:.2f} s ({len(grades) / elapsed:.0f} per second)")
+
+    scores = np.array([grade.difficulty for grade in grades])
+    percentiles = np.percentile(scores, [0, 10, 50, 90, 100])
+    print("difficulty: min {:.2f}, p10 {:.2f}, median {:.2f}, p90 {:.2f}, max {:.2f}".format(*percentiles))
+    print(f"near-optimal paths: median {np.median([grade.near_optimal for grade in grades]):.0f}, "
+          f"shortest-path hops: median {np.median([grade.hops for grade in grades]):.0f}")
+
+    if args.band:
+        kept = in_band(grades, *args.band)
+        print(f"{len(kept)} candidates ({len(kept) / len(grades):.1%}) in band {args.band[0]}..{args.band[1]}")
+        if args.pack:
+            from level_pack import write_pack  # Only needed when writing a pack
+            levels = (engine.generate_level(grade.level, grade.seed, args.nodes) for grade in kept)
+            print(f"wrote {write_pack(args.pack, levels)} levels to {args.pack}")
+
+
+if __name__ == "__main__":
+    main()
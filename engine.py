@@ -0,0 +1,346 @@
+# Headless game engine for Pathfinder Quest.
+# Holds level generation, the solver, path validation and scoring without any pygame dependency,
+# so levels can be generated, played and scored on servers without a display.
+# The state of a game lives in a GameState object, so one process can run many independent games.
+import random  # Library for generating random numbers
+from collections import namedtuple  # Lightweight record types
+
+import numpy as np  # Library for fast array operations
+
+from compact_graph import CompactGraph  # Array-backed graph used for every level
+from solvers import repair_shortest_path_tree, shortest_path_tree  # Shortest distances and next hops towards a node
+
+WIN_TOLERANCE = 1  # A path wins if its total weight is within this distance of the shortest path
+WIN_POINTS = 10  # Points awarded for a winning path
+MIN_WEIGHT, MAX_WEIGHT = 1, 10  # Range of edge weights, also kept by live traffic changes
+
+# A generated level: its number, the seed it was generated from, the graph, the start and end nodes
+# and optionally the node positions it should be drawn with (levels loaded from a level pack have them)
+Level = namedtuple("Level", ["level", "seed", "graph", "start_node", "end_node", "positions"], defaults=[None])
+
+def level_seed(base_seed, level):
+    """
+    Derives the seed of a level from the seed of a play session, so a whole session can be replayed.
+    Parameters:
+        base_seed: The seed of the session.
+        level: The level number.
+    Returns:
+        A 32-bit integer seed.
+    """
+    return int(np.random.SeedSequence([base_seed, level]).generate_state(1)[0])
+
+
+def level_node_count(level):
+    """
+    Returns the number of nodes a level has by default, based on the level number and capped at 10.
+    """
+    return min(5 + level * 2, 10)
+
+
+def generate_level_graph(level, seed=None, nodes_count=None, extra_edges=None):
+    """
+    Generates a graph for the given level with nodes, edges, and weights in O(n + m) time:
+    a random spanning tree keeps the graph connected and extra random edges make it more complex.
+    Parameters:
+        level: The current game level, which influences the number of nodes and edges.
+        seed: Optional seed (or numpy Generator) so the same graph can be generated again.
+        nodes_count: Optional number of nodes, overriding the level-based size.
+        extra_edges: Optional number of edges added on top of the spanning tree (defaults to nodes_count).
+    Returns:
+        A CompactGraph with nodes and weighted edges.
+    """
+    rng = np.random.default_rng(seed)
+    if nodes_count is None:
+        nodes_count = level_node_count(level)
+
+    # Random spanning tree: visit the nodes in random order and attach each one to a random earlier node
+    order = rng.permutation(nodes_count)
+    parents = (rng.random(nodes_count - 1) * np.arange(1, nodes_count)).astype(np.int64)
+    tree_u, tree_v = order[1:], order[parents]
+    tree_keys = np.minimum(tree_u, tree_v) * nodes_count + np.maximum(tree_u, tree_v)
+
+    # Add extra edges to make the graph more complex
+    if extra_edges is None:
+        extra_edges = int(nodes_count * 1.0)  # Determine the number of extra edges
+    free_pairs = nodes_count * (nodes_count - 1) // 2 - (nodes_count - 1)  # Node pairs not used by the tree
+    extra_edges = min(extra_edges, free_pairs)
+    if extra_edges * 2 > free_pairs:
+        # Dense request (only happens for tiny graphs): enumerating every pair is as cheap as sampling
+        pair_u, pair_v = np.triu_indices(nodes_count, 1)
+        keys = pair_u * nodes_count + pair_v
+        keys = rng.permutation(keys[~np.isin(keys, tree_keys)])[:extra_edges]
+    else:
+        # Sparse request: sample random pairs and drop self-loops, tree edges and duplicates
+        keys = np.empty(0, dtype=np.int64)
+        while len(keys) < extra_edges:
+            batch = 2 * (extra_edges - len(keys)) + 8
+            u, v = rng.integers(0, nodes_count, batch), rng.integers(0, nodes_count, batch)
+            candidates = (np.minimum(u, v) * nodes_count + np.maximum(u, v))[u != v]
+            candidates = np.concatenate([keys, candidates[~np.isin(candidates, tree_keys)]])
+            _, first = np.unique(candidates, return_index=True)
+            keys = candidates[np.sort(first)][:extra_edges]  # Keep the order the pairs were drawn in
+
+    edge_u = np.concatenate([tree_u, keys // nodes_count])
+    edge_v = np.concatenate([tree_v, keys % nodes_count])
+    weights = rng.integers(MIN_WEIGHT, MAX_WEIGHT + 1, len(edge_u))  # Assign random weights (1 to 10) to every edge
+    return CompactGraph(nodes_count, edge_u, edge_v, weights)  # Return the completed graph
+
+
+def generate_level(level, seed=None, nodes_count=None):
+    """
+    Generates everything a level needs before it can be played: the graph and the start and end nodes.
+    Parameters:
+        level: The level number.
+        seed: Optional seed; a random one is picked (and recorded) when it is None.
+        nodes_count: Optional number of nodes, overriding the level-based size.
+    Returns:
+        A Level tuple.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)  # Pick a seed so the level can still be reproduced later
+    rng = np.random.default_rng(seed)
+    graph = generate_level_graph(level, rng, nodes_count)
+    start, end = rng.choice(graph.number_of_nodes(), 2, replace=False).tolist()  # Randomly select start and end nodes
+    return Level(level, seed, graph, start, end)
+
+
+def traffic_changes(graph, rng, count=3, step=3):
+    """
+    Picks random weight changes for the "live traffic" mode: a few edges get a little faster or slower.
+    Parameters:
+        graph: The CompactGraph of the level.
+        rng: A numpy Generator.
+        count: Number of edges to change.
+        step: Largest change of a single weight; weights stay within MIN_WEIGHT..MAX_WEIGHT.
+    Returns:
+        A list of (u, v, new weight) triples.
+    """
+    edges = rng.choice(graph.number_of_edges(), min(count, graph.number_of_edges()), replace=False)
+    deltas = rng.integers(-step, step + 1, len(edges))
+    weights = np.clip(graph.weights[edges] + deltas, MIN_WEIGHT, MAX_WEIGHT)
+    return list(zip(graph.edge_u[edges].tolist(), graph.edge_v[edges].tolist(), weights.tolist()))
+
+
+def edge_key(u, v):
+    """Returns the edge between u and v in normalized form (smaller node first)."""
+    return (u, v) if u < v else (v, u)
+
+
+class GameState:
+    """
+    The state of one game: the current level, its solution and the path the player has selected so far.
+    Hash maps of the selected edges and nodes sit next to the ordered path, so membership checks (used for
+    every edge and node when drawing) are O(1). Many GameState objects can live in one process.
+    """
+
+    __slots__ = (
+        "graph",  # The CompactGraph of the current level
+        "start_node",  # The starting node in the graph
+        "end_node",  # The target node in the graph
+        "seed",  # The seed the current level was generated from
+        "shortest_path",  # The shortest path between the start and end nodes (list of nodes)
+        "shortest_path_length",  # The total weight (value) of the shortest path
+        "solution_edges",  # Edges that make up the shortest path
+        "distance_to_goal",  # Shortest distance from every node to the end node
+        "next_hop",  # The next node on a shortest path from every node to the end node (-1 at the end node)
+        "selected_path",  # The path the player selects by clicking on nodes
+        "highlighted_edges",  # Edges (connections) the player has selected, in order
+        "total_path_weight",  # Running total of weights for the player's selected path
+        "_solution_keys",  # Set of normalized solution edges
+        "_edge_counts",  # Normalized selected edge -> how many times the path uses it
+        "_node_counts",  # Selected node -> how many times the path visits it
+    )
+
+    def __init__(self):
+        self.graph = None
+        self.start_node = None
+        self.end_node = None
+        self.seed = None
+        self.shortest_path = []
+        self.shortest_path_length = None
+        self.solution_edges = []
+        self.distance_to_goal = None
+        self.next_hop = None
+        self.selected_path = []
+        self.highlighted_edges = []
+        self.total_path_weight = 0
+        self._solution_keys = set()
+        self._edge_counts = {}
+        self._node_counts = {}
+
+    def setup_level(self, level, reset_graph=True, seed=None, generated=None):
+        """
+        Sets up the game for a new level, including generating the graph, nodes, and shortest path.
+        Parameters:
+            level: The current level of the game.
+            reset_graph: Whether to generate a new graph for this level.
+            seed: Optional seed for the new graph.
+            generated: Optional Level that was generated in advance (e.g. by a LevelPool or from a LevelPack).
+        """
+        self.restore(())  # Clear the player's selected path
+
+        if reset_graph:
+            # Use the pre-generated level or generate a new graph with start and end nodes
+            if generated is None:
+                generated = generate_level(level, seed)
+            self.graph, self.start_node, self.end_node = generated.graph, generated.start_node, generated.end_node
+            self.seed = generated.seed
+
+        # One reverse Dijkstra from the end node gives the shortest path from every node,
+        # so feedback and hints during play never need another search
+        if reset_graph or self.distance_to_goal is None:
+            self.distance_to_goal, self.next_hop = shortest_path_tree(self.graph, self.end_node)
+        self._follow_solution()
+
+    def _follow_solution(self):
+        """Reads the shortest path, its length and its edges off the shortest-path tree."""
+        self.shortest_path_length = int(self.distance_to_goal[self.start_node])  # The total weight of the shortest path
+        path = [self.start_node]  # Follow the next hops from the start node to the end node
+        while path[-1] != self.end_node:
+            path.append(int(self.next_hop[path[-1]]))
+        self.shortest_path = path
+
+        # Store the edges that make up the shortest path
+        self.solution_edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        self._solution_keys = {edge_key(u, v) for u, v in self.solution_edges}
+
+    def update_edge_weights(self, changes):
+        """
+        Changes edge weights while the level is being played ("live traffic").
+        The shortest-path tree is repaired incrementally around every changed edge instead of being rebuilt,
+        and the weight of the player's path follows the new weights.
+        The level graph is modified in place, so it must not be shared with other games.
+        Parameters:
+            changes: Iterable of (u, v, new weight) triples for existing edges.
+        Returns:
+            The edges whose weight actually changed, as (u, v) pairs.
+        """
+        changed = []
+        for u, v, weight in changes:
+            old_weight = self.graph.set_weight(u, v, weight)
+            if old_weight == weight:
+                continue
+            changed.append((u, v))
+            self.total_path_weight += (weight - old_weight) * self._edge_counts.get(edge_key(u, v), 0)
+            repair_shortest_path_tree(self.graph, self.distance_to_goal, self.next_hop, u, v, old_weight)
+        if changed:
+            self._follow_solution()
+        return changed
+
+    def handle_click_on_node(self, node, last_node=None):
+        """
+        Handles the player's click on a node, checking if it's a valid move and updating the game state.
+        Parameters:
+            node: The node clicked by the player.
+            last_node: The last node selected by the player; defaults to last_selected_node().
+        Returns:
+            True if the move was valid, False otherwise.
+        """
+        if last_node is None:
+            last_node = self.last_selected_node()
+        edge = self.graph.edge_id(last_node, node)  # Look up the edge between the nodes, -1 if there is none
+        if edge < 0:
+            return False  # Move is invalid
+        self.selected_path.append(node)  # Add the node to the player's selected path
+        self.total_path_weight += int(self.graph.weights[edge])  # Update the total weight of the path
+        self.highlighted_edges.append((last_node, node))  # Highlight the selected edge
+        key = edge_key(last_node, node)
+        self._edge_counts[key] = self._edge_counts.get(key, 0) + 1
+        self._node_counts[node] = self._node_counts.get(node, 0) + 1
+        return True  # Move is valid
+
+    def undo_last_selection(self):
+        """
+        Undoes the player's last selection, removing the last node and its edge from the path.
+        Returns:
+            The removed edge, or None if nothing was selected.
+        """
+        if not self.selected_path:
+            return None
+        node = self.selected_path.pop()  # Remove the last node
+        last_node, _ = edge = self.highlighted_edges.pop()  # Remove the last highlighted edge
+        self.total_path_weight -= self.graph.weight(last_node, node)  # Subtract the edge weight
+        key = edge_key(last_node, node)
+        for counts, item in ((self._edge_counts, key), (self._node_counts, node)):
+            counts[item] -= 1
+            if not counts[item]:
+                del counts[item]
+        return edge
+
+    def snapshot(self):
+        """
+        Returns a compact, immutable copy of the player's progress, for undo, retry and replay.
+        Only the path is kept: its weight depends on the edge weights, which live traffic can change.
+        """
+        return tuple(self.selected_path)
+
+    def restore(self, snapshot):
+        """
+        Puts the player's progress back to a snapshot taken on the same level.
+        The path weight is recomputed with the current edge weights.
+        Parameters:
+            snapshot: A value returned by snapshot().
+        """
+        self.selected_path = list(snapshot)
+        previous = ([self.start_node] + self.selected_path)[:-1]
+        self.highlighted_edges = list(zip(previous, self.selected_path))
+        self.total_path_weight = 0
+        if self.selected_path:
+            self.total_path_weight = int(self.graph.weights[self.graph.edge_ids(previous, self.selected_path)].sum())
+        self._edge_counts, self._node_counts = {}, {}
+        for (u, v), node in zip(self.highlighted_edges, self.selected_path):
+            key = edge_key(u, v)
+            self._edge_counts[key] = self._edge_counts.get(key, 0) + 1
+            self._node_counts[node] = self._node_counts.get(node, 0) + 1
+
+    def last_selected_node(self):
+        """
+        Returns the node the next click has to connect to: the last selected node, or the start node.
+        """
+        return self.selected_path[-1] if self.selected_path else self.start_node
+
+    def is_selected(self, node):
+        """Returns True if the node is on the player's path, in O(1)."""
+        return node in self._node_counts
+
+    def is_highlighted(self, u, v):
+        """Returns True if the edge between u and v is on the player's path, in O(1)."""
+        return edge_key(u, v) in self._edge_counts
+
+    def is_solution_edge(self, u, v):
+        """Returns True if the edge between u and v is on the shortest path, in O(1)."""
+        return edge_key(u, v) in self._solution_keys
+
+    def path_deviation(self):
+        """
+        Returns, in O(1), how much longer than the shortest path the best completion of the selected path is.
+        0 means the path so far is still on a shortest path to the end node.
+        """
+        return self.total_path_weight + int(self.distance_to_goal[self.last_selected_node()]) - self.shortest_path_length
+
+    def is_still_optimal(self):
+        """
+        Returns True if the path selected so far can still be completed into a shortest path.
+        """
+        return self.path_deviation() == 0
+
+    def hint(self, node=None):
+        """
+        Returns the next node on a shortest path to the end node, in O(1).
+        Parameters:
+            node: The node to give a hint for; defaults to the last selected node.
+        Returns:
+            The next node to click, or None if the node is the end node.
+        """
+        if node is None:
+            node = self.last_selected_node()
+        step = int(self.next_hop[node])
+        return None if step < 0 else step
+
+    def is_winning_path(self):
+        """
+        Checks the player's path against the shortest path.
+        Returns:
+            True if the total weight of the selected path is close enough to the shortest path length.
+        """
+        return abs(self.total_path_weight - self.shortest_path_length) <= WIN_TOLERANCE
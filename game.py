@@ -1,32 +1,108 @@
 # Import the necessary libraries
 import pygame  # Library for creating games and visual interfaces
-import networkx as nx  # Library for creating and working with graphs
-import random  # Library for generating random numbers (used later)
-
-# Initialize pygame to set up the game environment
-pygame.init()
+import argparse  # Library for reading command-line options
+import numpy as np  # Random generator for live traffic
+import engine  # Headless game logic: level generation, solver, path validation and scoring
+import layout  # Node positions on the screen
+from level_pool import LevelPool  # Generates upcoming levels in the background
+from level_pack import LevelPack  # Plays levels stored in a level pack file
+from spatial_index import GridIndex  # Finds the node under the mouse without scanning every node
+from recording import AttemptLog, UNDO  # Optional log of every finished attempt
+from camera import Camera  # Pan and zoom over the board
 
 # Define screen dimensions and colors for the game
 WIDTH, HEIGHT = 800, 600  # Width and height of the game window
 WHITE, BLACK, RED, GREEN, BLUE, GRAY, YELLOW = (255, 255, 255), (0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255), (200, 200, 200), (255, 255, 0)
 # Colors are defined using RGB (Red, Green, Blue) values, with each value ranging from 0 to 255)
-FONT = pygame.font.SysFont(None, 24)  # Create a font for displaying text on the screen, font size 24, default system font
-
-# Create the game screen (the window where the game is displayed)
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pathfinder Quest")  # Set the title of the game window
-
-# Initialize global variables to manage the game's state
-graph = None  # The graph structure that will represent nodes and connections
-pos = None  # Positions of the nodes in the graph
-start_node = None  # The starting node in the graph
-end_node = None  # The target node in the graph
-shortest_path = []  # The shortest path between the start and end nodes (list of nodes)
-shortest_path_length = None  # The total weight (value) of the shortest path
-selected_path = []  # The path the player selects by clicking on nodes
-total_path_weight = [0]  # Running total of weights for the player's selected path
-highlighted_edges = []  # Edges (connections) to highlight during gameplay
+NODE_RADIUS = 15  # Radius of nodes for visualization
+CLICK_RADIUS = 20  # Distance from a node center within which a click selects the node
+EDGE_THICKNESS = 6  # Edge thickness for better visibility
+SOLUTION_BUTTON_RECT = pygame.Rect(WIDTH - 150, 10, 130, 40)  # Show/Hide Solution button at the top-right corner
+FINISH_BUTTON_RECT = pygame.Rect(650, 550, 100, 40)  # Finish button at the bottom-right corner
+UNDO_BUTTON_RECT = pygame.Rect(520, 550, 100, 40)  # Undo button next to it
+FIXED_BUTTONS = [("Finish", FINISH_BUTTON_RECT), ("Undo", UNDO_BUTTON_RECT)]  # Buttons drawn into the static layer
+TRAFFIC_EVENT = pygame.USEREVENT + 1  # Timer event that changes edge weights in live traffic mode
+TRAFFIC_EDGES = 3  # Edges changed by every traffic update
+ZOOM_STEP = 1.25  # Zoom factor of one mouse wheel step
+PAN_STEP = 60  # Screen pixels moved by one arrow key press
+
+# Level-of-detail rules. Nodes are drawn smaller when they get closer together on the screen than
+# NODE_SPACING; weight labels are hidden below LABEL_MIN_RADIUS and nodes are merged below MERGE_RADIUS.
+NODE_SPACING = 60  # Screen distance between nodes at which they are drawn at full size
+LABEL_MIN_RADIUS = 9  # Smallest node radius at which weight and node labels are drawn
+MERGE_RADIUS = 4  # Below this node radius, nodes are merged into one dot per MERGE_CELL screen cell
+MERGE_CELL = 8  # Size of the screen cells nodes and edges are merged into
+MIN_NODE_RADIUS = 4  # Smallest radius for nodes that are always drawn on their own (start, end, selected)
+
+# The window, fonts and clock are created by init_display() when the game starts,
+# so importing this module does not open a window
+screen = None  # The game screen (the window where the game is displayed)
+FONT = None  # Font for displaying text on the screen, font size 24, default system font
+EDGE_FONT = None  # Smaller font for edge weights and node labels, created once instead of every frame
+clock = None  # Clock used to cap how often the game loops run
+fps_cap = 30  # Maximum number of event batches handled per second (changed with --fps)
+
+# Initialize global variables to manage the display state
+state = engine.GameState()  # The game being played in this window
+world_pos = None  # Layout positions of the nodes, an (n, 2) array indexed by node
+pos = None  # Screen positions of the nodes under the current camera, an (n, 2) array indexed by node
+layout_kind = "auto"  # Layout used for the levels (changed with --layout)
+node_index = None  # Spatial index over world_pos, rebuilt with every layout
+camera = Camera()  # Pan and zoom of the board, reset for every generated level
+node_spacing = NODE_SPACING  # Typical world distance between neighboring nodes of the current layout
+edge_bounds = None  # (m, 4) array with the world bounding box (left, top, right, bottom) of every edge
 show_solution = False  # Boolean flag to show or hide the correct solution path
+live_traffic = False  # Whether edge weights change while a level is played (changed with --traffic)
+
+# Level of detail for the current zoom, set by update_view()
+node_radius = NODE_RADIUS  # Radius nodes are drawn with
+edge_thickness = EDGE_THICKNESS  # Thickness edges are drawn with
+show_labels = True  # Whether weight and node labels are drawn
+merge_nodes = False  # Whether nodes are merged into one dot per screen cell
+
+# Retained-mode rendering state, rebuilt once per generated level and whenever the camera moves.
+# Only what intersects the screen is drawn into it.
+static_layer = None  # Off-screen surface holding everything that never changes during a level
+edge_layer = None  # Off-screen surface with only the background and edges, for repainting changed weight labels
+node_list = []  # Visible nodes drawn on their own, in the same order as node_rects
+node_rects = []  # Screen rectangle covered by each node disc
+label_rects = []  # Screen rectangle covered by each visible edge weight label
+label_surfaces = []  # Pre-rendered edge weight labels, aligned with label_rects
+label_slots = {}  # Edge id -> position of its label in label_rects
+weight_labels = {}  # Weight -> rendered label, shared by all edges with that weight
+
+
+def init_display():
+    """
+    Initializes pygame and creates the game window, fonts and clock.
+    """
+    global screen, FONT, EDGE_FONT, clock
+    pygame.init()  # Initialize pygame to set up the game environment
+    FONT = pygame.font.SysFont(None, 24)
+    EDGE_FONT = pygame.font.SysFont(None, 18)
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))  # Create the game screen
+    pygame.display.set_caption("Pathfinder Quest")  # Set the title of the game window
+    clock = pygame.time.Clock()
+
+
+def wait_for_events():
+    """
+    Sleeps until at least one event arrives, then returns it together with every other queued event.
+    The clock caps how often this returns, so bursts of input are handled at most fps_cap times per second
+    and an idle window uses no CPU.
+    Returns:
+        A list of pygame events.
+    """
+    clock.tick(fps_cap)  # Wait out the rest of the frame if the last batch was handled recently
+    return [pygame.event.wait()] + pygame.event.get()  # Block until input arrives, then drain the queue
+
+
+def is_expose_event(event):
+    """
+    Returns True if the window contents were lost (e.g. uncovered or restored) and must be presented again.
+    """
+    return event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+
 
 def display_intro_screen():
     """Displays the intro screen with game rules and a Start button."""
@@ -48,7 +124,8 @@ def display_intro_screen():
         "3. Click on nodes to create a path",
         "4. Press 'Undo' to remove the last selected node",
         "5. Press 'Show Solution' to see the correct path",
-        "6. Close the window to end the game",
+        "6. Scroll to zoom, drag with the right mouse button to move around",
+        "7. Close the window to end the game",
     ]
 
 # Loop through each rule and display it on the screen
@@ -63,8 +140,10 @@ def display_intro_screen():
 
     # Wait for the player to click "Start Game"
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:  # If the player closes the window
+        for event in wait_for_events():
+            if is_expose_event(event):  # The window was uncovered
+                pygame.display.flip()  # Present the intro screen again
+            elif event.type == pygame.QUIT:  # If the player closes the window
                 pygame.quit()  # Quit the game
                 return False  # Stop running the game
             elif event.type == pygame.MOUSEBUTTONDOWN:  # If the player clicks the mouse
@@ -72,221 +151,431 @@ def display_intro_screen():
                 if is_button_clicked(WIDTH // 2 - 50, HEIGHT - 100, 100, 40, mouse_pos):  # Check if the "Start Game" button was clicked
                     return True  # Start the game
 
-def generate_circular_layout(graph, width, height, padding=100):
+def setup_level(level, reset_graph=True, generated=None):
     """
-    Generates a circular layout for the graph nodes and scales it to fit within the screen dimensions.
+    Sets up the game for a new level: lets the engine prepare the graph and shortest path,
+    then lays out the nodes and pre-renders the board.
     Parameters:
-        graph: The graph whose nodes need positioning.
-        width: The width of the screen.
-        height: The height of the screen.
-        padding: Optional padding to keep nodes away from screen edges.
-    Returns:
-        A dictionary of node positions scaled and centered on the screen.
+        level: The current level of the game.
+        reset_graph: Whether to generate a new graph for this level.
+        generated: Optional engine.Level that was generated in advance.
     """
-    # Use networkx's circular layout to position nodes in a circle
-    pos = nx.circular_layout(graph)
-    scale = min(width, height) / 2 - padding  # Scale to fit within the screen with padding
+    global world_pos, node_index, node_spacing, edge_bounds, show_solution
+    if reset_graph and live_traffic and generated is not None:
+        # Traffic changes the weights in place; pooled, cached or packed levels must stay untouched
+        generated = generated._replace(graph=generated.graph.copy())
+    state.setup_level(level, reset_graph, generated=generated)  # Prepare the graph, start/end nodes and the solution
+    show_solution = False  # Ensure the solution is not shown initially
+
+    if reset_graph:
+        if generated is not None and generated.positions is not None:
+            world_pos = generated.positions  # Pooled and packed levels come with their layout
+        else:
+            world_pos = layout.cached_layout(state.graph, state.seed, WIDTH, HEIGHT, layout_kind)  # Layout for nodes
+        world_pos = np.asarray(world_pos, dtype=float).reshape(-1, 2)
+        # Typical distance between nodes if they were spread evenly over the layout
+        span = np.ptp(world_pos, axis=0) if len(world_pos) else np.zeros(2)
+        area = float(span[0] * span[1])
+        node_spacing = np.sqrt(area / len(world_pos)) if area > 0 else NODE_SPACING
+        # Index for hit-testing and culling; cells twice the node spacing hold a few nodes each at any level size
+        node_index = GridIndex(world_pos, 2 * node_spacing)
+        ends = np.concatenate([world_pos[state.graph.edge_u], world_pos[state.graph.edge_v]], axis=1)
+        edge_bounds = np.column_stack([np.minimum(ends[:, :2], ends[:, 2:]), np.maximum(ends[:, :2], ends[:, 2:])])
+        camera.reset()  # Start every level showing the whole layout
+        camera.max_zoom = max(8.0, 2 * NODE_SPACING / node_spacing)  # Enough to see every node at full size
+        update_view()  # Pre-render the parts of the level that never change
+
+
+def update_view():
+    """
+    Applies the camera: recomputes the screen position of every node, picks the level of detail for the
+    current zoom and rebuilds the static layer for what is now on the screen.
+    """
+    global pos, node_radius, edge_thickness, show_labels, merge_nodes
+    pos = camera.to_screen(world_pos)
+    detail = min(1.0, camera.zoom * node_spacing / NODE_SPACING)  # 1 means nodes have room for full size
+    radius = NODE_RADIUS * detail
+    show_labels = radius >= LABEL_MIN_RADIUS
+    merge_nodes = radius < MERGE_RADIUS
+    node_radius = max(MIN_NODE_RADIUS, round(radius))
+    edge_thickness = max(1, round(EDGE_THICKNESS * detail))
+    build_static_layer()
+
+
+def visible_edges():
+    """
+    Returns the ids of the edges whose bounding box intersects the screen (view culling).
+    """
+    left, top, right, bottom = camera.world_rect(WIDTH, HEIGHT, node_radius + 2 + edge_thickness)
+    inside = ((edge_bounds[:, 0] <= right) & (edge_bounds[:, 2] >= left)
+              & (edge_bounds[:, 1] <= bottom) & (edge_bounds[:, 3] >= top))
+    return np.flatnonzero(inside)
 
-    # Scale and center each node's position
-    for node in pos:
-        pos[node][0] = int(pos[node][0] * scale + width / 2)  # X-coordinate
-        pos[node][1] = int(pos[node][1] * scale + height / 2)  # Y-coordinate
-    
-    return pos  # Return the updated positions
 
-def handle_click_on_node(node, last_node):
+def visible_nodes():
     """
-    Handles the player's click on a node, checking if it's a valid move and updating the game state.
+    Returns the ids of the nodes whose disc intersects the screen (view culling).
+    """
+    return node_index.query_rect(*camera.world_rect(WIDTH, HEIGHT, node_radius + 2))
+
+
+def edge_color(u, v):
+    """
+    Returns the color an edge should currently be drawn in.
     Parameters:
-        node: The node clicked by the player.
-        last_node: The last node selected by the player.
-    Returns:
-        True if the move was valid, False otherwise.
-    """
-    global selected_path, total_path_weight, highlighted_edges
-    if graph.has_edge(last_node, node):  # Ensure the nodes are connected
-        selected_path.append(node)  # Add the node to the player's selected path
-        edge_weight = graph.edges[last_node, node]['weight']  # Get the edge's weight
-        total_path_weight[0] += edge_weight  # Add edge weight  # Update the total weight of the path
-        highlighted_edges.append((last_node, node))  # Highlight the selected edge
-        return True # Move is valid
-    return False  # Move is invalid
-
-def undo_last_selection():
-    """
-    Undoes the player's last selection, removing the last node and its edge from the path.
-    Updates the path weight and removes the last highlighted edge.
-    """
-    global selected_path, total_path_weight, highlighted_edges
-    if len(selected_path) > 1:  # If there are multiple nodes in the path
-        # Remove the last selected node and update total weight
-        last_node = selected_path.pop()  # Remove the last node
-        prev_node = selected_path[-1]  # Get the new last node
-        edge_weight = graph.edges[prev_node, last_node]['weight']  # Get the edge weight
-        total_path_weight[0] -= edge_weight  # Subtract the edge weight
-        # Remove the last highlighted edge
-        highlighted_edges.pop()
-    elif len(selected_path) == 1:
-        # If there's only one node left, clear everything
-        selected_path.clear()
-        total_path_weight[0] = 0  # Reset the path weight
-        highlighted_edges.clear()  # Clear highlighted edges
-
-
-def generate_level_graph(level):
-    """
-    Generates a graph for the given level with nodes, edges, and weights.
+        u, v: The two nodes connected by the edge.
+    """
+    if show_solution and state.is_solution_edge(u, v):
+        return RED  # Prioritize solution edges in red
+    elif state.is_highlighted(u, v):
+        return YELLOW  # Highlight selected path edges in yellow
+    return WHITE  # Default color for unselected edges
+
+
+def base_node_color(node):
+    """
+    Returns the fill color and label a node has in the static layer, before anything is selected.
     Parameters:
-        level: The current game level, which influences the number of nodes and edges.
-    Returns:
-        A NetworkX graph object with nodes and weighted edges.
+        node: The node to look up.
     """
-    # Determine the number of nodes based on the level, capped at 10
-    nodes_count = min(5 + level * 2, 10)
-    graph = nx.Graph()  # Create an empty graph
-    graph.add_nodes_from(range(nodes_count))  # Add notes to the graph
-    mst = nx.minimum_spanning_tree(nx.complete_graph(nodes_count))  # Generate a Minimum Spanning Tree (MST) from a complete graph
-    
-    for u, v in mst.edges:
-        # Assign random weights (1 to 10) to the edges in the MST
-        weight = random.randint(1, 10)
-        graph.add_edge(u, v, weight=weight)  # Add edges with weights to the graph
-
-    # Add extra edges to make the graph more complex
-    extra_edges = int(nodes_count * 1.0)  # Determine the number of extra edges
-    possible_edges = list(nx.non_edges(graph))  # Get all possible edges not already in the graph
-    random.shuffle(possible_edges)  # Randomize the order of these edges
-    
-    for i in range(min(extra_edges, len(possible_edges))):
-        u, v = possible_edges[i]  # Select an edge from the shuffled list
-        weight = random.randint(1, 10)  # Assign a random weight to the edge
-        graph.add_edge(u, v, weight=weight)  # Add the extra edge to the graph
-    
-    return graph  # Return the completed graph
+    if node == state.start_node:
+        return GREEN, "Start"  # Start node color and label
+    elif node == state.end_node:
+        return RED, "End"  # End node color and label
+    return WHITE, ""  # Default node color
+
 
-def setup_level(level, reset_graph=True):
+def node_color(node):
     """
-    Sets up the game for a new level, including generating the graph, nodes, and shortest path.
+    Returns the fill color and label a node should currently be drawn with.
     Parameters:
-        level: The current level of the game.
-        reset_graph: Whether to generate a new graph for this level.
+        node: The node to look up.
     """
-    global graph, pos, start_node, end_node, shortest_path, shortest_path_length, selected_path, total_path_weight, show_solution, solution_edges
-    # Reset game state variables
-    selected_path.clear()  # Clear the player's selected path
-    total_path_weight[0] = 0  # Reset the total weight of the selected path
-    highlighted_edges.clear()  # Clear the highlighted edges
-    show_solution = False  # Ensure the solution is not shown initially
-    solution_edges = []  # Clear the solution edges for the new round
-    
-    if reset_graph:
-        # Generate a new graph and positions for the nodes
-        graph = generate_level_graph(level)
-        pos = generate_circular_layout(graph, WIDTH, HEIGHT)  # Layout for nodes
-        nodes = list(graph.nodes)  # Get a list of all nodes
-        start_node, end_node = random.sample(nodes, 2)  # Randomly select start and end nodes
-    
-    # Calculate the shortest path and store it
-    shortest_path = nx.shortest_path(graph, source=start_node, target=end_node, weight='weight')
-    # Calculate the total weight of the shortest path
-    shortest_path_length = sum(
-        graph.edges[shortest_path[i], shortest_path[i + 1]]['weight']
-        for i in range(len(shortest_path) - 1)
-    )
-    
-    # Store the edges that make up the shortest path
-    solution_edges = [(shortest_path[i], shortest_path[i + 1]) for i in range(len(shortest_path) - 1)]
+    if node != state.start_node and node != state.end_node and state.is_selected(node):
+        return YELLOW, ""  # Color for nodes in the selected path
+    return base_node_color(node)
 
 
-def draw_graph():
+def draw_node(surface, node, color, label):
     """
-    Draws the graph on the game screen, including nodes, edges, and highlighting.
+    Draws a single node disc with a black border and an optional label.
+    Parameters:
+        surface: The surface to draw on.
+        node: The node to draw.
+        color: The fill color of the node.
+        label: Text drawn at the node center, or an empty string; hidden when zoomed out.
     """
-    screen.fill(GRAY)  # Fill the background with gray
-    node_radius = 15  # Radius of nodes for visualization
-    font = pygame.font.SysFont(None, 18)  # Font for displaying text on nodes
-    edge_thickness = 6  # Edge thickness for better visibility
+    pygame.draw.circle(surface, BLACK, pos[node], node_radius + 2)  # Black border
+    pygame.draw.circle(surface, color, pos[node], node_radius)  # Node fill color
+    if label and show_labels:
+        label_text = EDGE_FONT.render(label, True, BLACK)  # Render the node label
+        label_rect = label_text.get_rect(center=(pos[node][0], pos[node][1]))  # Position label at node center
+        surface.blit(label_text, label_rect)  # Draw the label on the surface
 
-    # Draw all edges with conditional coloring based on their state
-    for u, v in graph.edges:
-        if show_solution and ((u, v) in solution_edges or (v, u) in solution_edges):
-            color = RED  # Prioritize solution edges in red
-        elif (u, v) in highlighted_edges or (v, u) in highlighted_edges:
-            color = YELLOW  # Highlight selected path edges in yellow
-        else:
-            color = WHITE  # Default color for unselected edges
-        pygame.draw.line(screen, color, pos[u], pos[v], edge_thickness)  # Draw the edge
-
-    # Draw all edge weights on top of the edges to ensure they are visible
-    for u, v in graph.edges:
-        edge_weight = graph.edges[u, v]['weight']  # Get the weight of the edge
-        # Calculate the midpoint of the edge to position the weight
-        midpoint = ((pos[u][0] + pos[v][0]) // 2, (pos[u][1] + pos[v][1]) // 2)
-        weight_text = font.render(str(edge_weight), True, BLACK)  # Render the weight as text
-        text_rect = weight_text.get_rect(center=midpoint)  # Position the text at the midpoint
-        screen.blit(weight_text, text_rect)  # Draw the weight text on the screen
-
-
-    # Draw all nodes on top of edges to ensure they are not covered
-    for node in graph.nodes:
-        color = WHITE  # Default node color
-        label = ""  # Label for the node (e.g., Start or End)
-        if node == start_node:
-            color = GREEN  # Start node color
-            label = "Start"  # Label for the start node
-        elif node == end_node:
-            color = RED  # End node color
-            label = "End"  # Label for the end node
-        elif node in selected_path:
-            color = YELLOW  # Color for nodes in the selected path
-
-        # Draw the node with a black border for better visibility
-        pygame.draw.circle(screen, BLACK, pos[node], node_radius + 2)  # Black border
-        pygame.draw.circle(screen, color, pos[node], node_radius)  # Node fill color
-
-        if label:
-            label_text = font.render(label, True, BLACK)  # Render the node label
-            label_rect = label_text.get_rect(center=(pos[node][0], pos[node][1]))  # Position label at node center
-            screen.blit(label_text, label_rect)  # Draw the label on the screen
-
-    # Draw action buttons for the game
-    draw_button("Finish", 650, 550, 100, 40)  # Finish button at bottom right
-    draw_button("Undo", 520, 550, 100, 40)  # Undo button to reverse actions
-    # Show or hide solution button
+
+def edge_rect(u, v):
+    """
+    Returns the screen rectangle touched when the edge between u and v is redrawn,
+    including the discs of both end nodes.
+    """
+    margin = node_radius + 2 + edge_thickness  # Room for the node borders and the line thickness
+    left, right = min(pos[u][0], pos[v][0]), max(pos[u][0], pos[v][0])
+    top, bottom = min(pos[u][1], pos[v][1]), max(pos[u][1], pos[v][1])
+    return pygame.Rect(left - margin, top - margin, right - left + 2 * margin, bottom - top + 2 * margin)
+
+
+def colored_edges():
+    """
+    Returns the edges that are drawn in a non-default color on top of the static layer.
+    """
+    if show_solution:
+        return state.highlighted_edges + state.solution_edges
+    return state.highlighted_edges
+
+
+def weight_label(weight):
+    """Returns the rendered label for an edge weight; every weight is rendered only once."""
+    if weight not in weight_labels:
+        weight_labels[weight] = EDGE_FONT.render(str(weight), True, BLACK)
+    return weight_labels[weight]
+
+
+def draw_merged(surface, edges, nodes):
+    """
+    Draws a zoomed-out board: nodes are merged into one dot per MERGE_CELL screen cell, and edges into
+    one thin line per pair of cells they connect, so the cost depends on the screen size, not the graph size.
+    Parameters:
+        surface: The surface to draw on.
+        edges: Ids of the visible edges.
+        nodes: Ids of the visible nodes.
+    """
+    cells_u = pos[state.graph.edge_u[edges]] // MERGE_CELL
+    cells_v = pos[state.graph.edge_v[edges]] // MERGE_CELL
+    swap = (cells_u[:, 0] > cells_v[:, 0]) | ((cells_u[:, 0] == cells_v[:, 0]) & (cells_u[:, 1] > cells_v[:, 1]))
+    pairs = np.where(swap[:, None], np.hstack([cells_v, cells_u]), np.hstack([cells_u, cells_v]))
+    pairs = np.unique(pairs, axis=0) if len(pairs) else pairs
+    pairs = pairs[(pairs[:, 0] != pairs[:, 2]) | (pairs[:, 1] != pairs[:, 3])]  # Edges inside one cell vanish
+    centers = (pairs * MERGE_CELL + MERGE_CELL // 2).tolist()
+    for x1, y1, x2, y2 in centers:
+        pygame.draw.line(surface, WHITE, (x1, y1), (x2, y2), edge_thickness)
+
+    cells, counts = np.unique(pos[nodes] // MERGE_CELL, axis=0, return_counts=True)
+    radii = np.minimum(1 + np.sqrt(counts).astype(np.int64), MERGE_CELL // 2)  # Busier cells get bigger dots
+    for (cx, cy), radius in zip((cells * MERGE_CELL + MERGE_CELL // 2).tolist(), radii.tolist()):
+        pygame.draw.circle(surface, BLACK, (cx, cy), radius + 1)
+        pygame.draw.circle(surface, WHITE, (cx, cy), radius)
+
+
+def build_static_layer():
+    """
+    Pre-renders the parts of the level that never change while it is played
+    (background, edges, weight labels, nodes and the fixed buttons) into an off-screen surface.
+    Only the edges and nodes that intersect the screen are drawn, with the current level of detail.
+    Called once per generated level and after every camera move; every later frame starts from this layer.
+    """
+    global static_layer, edge_layer, node_list, node_rects, label_rects, label_surfaces, label_slots
+    static_layer = pygame.Surface((WIDTH, HEIGHT))  # Off-screen surface the size of the window
+    static_layer.fill(GRAY)  # Fill the background with gray
+    edges, nodes = visible_edges(), visible_nodes()
+    edge_u, edge_v = state.graph.edge_u[edges].tolist(), state.graph.edge_v[edges].tolist()
+
+    # Draw the visible edges in their default color
+    if merge_nodes:
+        draw_merged(static_layer, edges, nodes)
+    else:
+        for u, v in zip(edge_u, edge_v):
+            pygame.draw.line(static_layer, WHITE, pos[u], pos[v], edge_thickness)
+    edge_layer = static_layer.copy()  # Kept so weight labels can be replaced when weights change
+
+    # Place the weight label of every visible edge at its midpoint
+    label_rects, label_surfaces, label_slots = [], [], {}
+    if show_labels:
+        for edge, u, v, weight in zip(edges.tolist(), edge_u, edge_v, state.graph.weights[edges].tolist()):
+            midpoint = ((pos[u][0] + pos[v][0]) // 2, (pos[u][1] + pos[v][1]) // 2)  # Midpoint of the edge
+            weight_text = weight_label(weight)
+            text_rect = weight_text.get_rect(center=midpoint)  # Position the text at the midpoint
+            static_layer.blit(weight_text, text_rect)
+            label_slots[edge] = len(label_rects)
+            label_surfaces.append(weight_text)
+            label_rects.append(text_rect)
+
+    # Draw the visible nodes in their initial colors on top of the edges;
+    # when they are merged, only the start and end nodes are drawn on their own
+    if merge_nodes:
+        node_list = [node for node in (state.start_node, state.end_node) if node in set(nodes.tolist())]
+    else:
+        node_list = nodes.tolist()
+    node_rects = []
+    for node in node_list:
+        color, label = base_node_color(node)
+        draw_node(static_layer, node, color, label)
+        node_rects.append(node_rect(node))
+
+    # Draw the buttons whose label never changes: Finish at bottom right, Undo to reverse actions
+    for text, rect in FIXED_BUTTONS:
+        draw_button(text, *rect, static_layer)
+
+
+def node_rect(node):
+    """Returns the screen rectangle covered by a node disc and its border."""
+    return pygame.Rect(pos[node][0] - node_radius - 2, pos[node][1] - node_radius - 2,
+                       2 * node_radius + 4, 2 * node_radius + 4)
+
+
+def update_weight_labels(edges):
+    """
+    Re-renders the weight labels of edges whose weight changed and patches them into the static layer.
+    Only the old and new label areas are rebuilt: the edges under them come from edge_layer, then the labels
+    and nodes on top are drawn again. Edges without a visible label are skipped.
+    Parameters:
+        edges: The (u, v) edges whose weight changed.
+    """
+    for u, v in edges:
+        slot = label_slots.get(state.graph.edge_id(u, v))
+        if slot is None:
+            continue  # Off screen, or labels are hidden at this zoom
+        weight_text = weight_label(state.graph.weight(u, v))
+        text_rect = weight_text.get_rect(center=label_rects[slot].center)
+        area = label_rects[slot].union(text_rect)
+        label_surfaces[slot], label_rects[slot] = weight_text, text_rect
+
+        static_layer.blit(edge_layer, area, area)  # Background and edges without any label
+        static_layer.set_clip(area)
+        for i in area.collidelistall(label_rects):
+            static_layer.blit(label_surfaces[i], label_rects[i])
+        for i in area.collidelistall(node_rects):
+            color, label = base_node_color(node_list[i])
+            draw_node(static_layer, node_list[i], color, label)
+        for text, rect in FIXED_BUTTONS:
+            if area.colliderect(rect):
+                draw_button(text, *rect, static_layer)
+        static_layer.set_clip(None)
+
+
+def apply_traffic(changes):
+    """
+    Applies live traffic weight changes and repaints only the edges they affect:
+    the changed edges and, while the solution is shown, the edges that joined or left the shortest path.
+    Parameters:
+        changes: A list of (u, v, new weight) triples.
+    """
+    old_solution = state.solution_edges
+    changed = state.update_edge_weights(changes)  # Repairs the shortest-path tree incrementally
+    if not changed:
+        return
+    update_weight_labels(changed)
+    edges = list(changed)
+    if show_solution and old_solution != state.solution_edges:
+        old_keys = {engine.edge_key(u, v) for u, v in old_solution}
+        new_keys = {engine.edge_key(u, v) for u, v in state.solution_edges}
+        edges += list(old_keys ^ new_keys)  # Edges whose solution color appears or disappears
+    redraw_edges(edges)
+
+
+def draw_solution_button():
+    """
+    Draws the Show/Hide Solution button and returns its rectangle.
+    """
     solution_button_text = "Hide Solution" if show_solution else "Show Solution"
-    draw_button(solution_button_text, WIDTH - 150, 10, 130, 40)  # Positioned at the top-right corner
+    draw_button(solution_button_text, *SOLUTION_BUTTON_RECT)  # Positioned at the top-right corner
+    return SOLUTION_BUTTON_RECT
+
 
+def redraw_region(rect):
+    """
+    Restores a screen region from the static layer and repaints the dynamic state inside it:
+    highlighted and solution edges, the weight labels and nodes on top of them.
+    Parameters:
+        rect: The pygame.Rect to repaint.
+    """
+    screen.blit(static_layer, rect, rect)  # Restore the untouched background for this region
+    screen.set_clip(rect)  # Keep all following drawing inside the region
+
+    # Only edges with a non-default color need to be drawn over the static layer
+    for u, v in colored_edges():
+        if edge_rect(u, v).colliderect(rect):
+            pygame.draw.line(screen, edge_color(u, v), pos[u], pos[v], edge_thickness)
+
+    # Weight labels and nodes stay on top of the edges
+    for i in rect.collidelistall(label_rects):
+        screen.blit(label_surfaces[i], label_rects[i])
+    for i in rect.collidelistall(node_rects):
+        color, label = node_color(node_list[i])
+        draw_node(screen, node_list[i], color, label)
+    if merge_nodes:
+        # Merged dots hide single nodes, so the player's path is drawn on its own
+        for node in dict.fromkeys(state.selected_path):
+            if node_rect(node).colliderect(rect):
+                color, label = node_color(node)
+                draw_node(screen, node, color, label)
+
+    if rect.colliderect(SOLUTION_BUTTON_RECT):
+        draw_solution_button()  # The toggle button sits above the board
+    screen.set_clip(None)
+
+
+def redraw_edges(edges, extra_rects=()):
+    """
+    Repaints only the parts of the screen touched by the given edges and pushes them to the display.
+    Parameters:
+        edges: The edges whose state changed.
+        extra_rects: Additional screen rectangles that were already redrawn and need updating.
+    """
+    overlay_edges = colored_edges()
+    dirty_rects = []
+    for u, v in edges:
+        rect = edge_rect(u, v)
+        if not rect.colliderect(screen.get_rect()):
+            continue  # Off screen: nothing to repaint
+        # Grow the region until it fully contains every colored edge crossing it, so no line is cut at the border
+        grown = True
+        while grown:
+            grown = False
+            for a, b in overlay_edges:
+                other = edge_rect(a, b)
+                if other.colliderect(rect) and not rect.contains(other):
+                    rect.union_ip(other)
+                    grown = True
+        redraw_region(rect)
+        dirty_rects.append(rect)
+    pygame.display.update(dirty_rects + list(extra_rects))  # Only send the changed regions to the display
+
+
+def draw_graph():
+    """
+    Draws the whole graph on the game screen from the static layer plus the current highlighting.
+    Used when a level starts or after a popup covered the board; later changes go through redraw_edges.
+    """
+    screen.blit(static_layer, (0, 0))  # Copy the pre-rendered level
+    redraw_region(screen.get_rect())  # Paint the dynamic state on top
     pygame.display.flip()  # Update the display with all the changes
 
 
-def get_node_from_position(mouse_pos, radius=20):
+def toggle_solution():
+    """
+    Shows or hides the solution path and repaints only the solution edges and the toggle button.
+    """
+    global show_solution
+    show_solution = not show_solution  # Toggle solution visibility
+    redraw_edges(state.solution_edges, [draw_solution_button()])
+
+
+def move_camera(event):
+    """
+    Pans or zooms the camera for a mouse wheel, right-button drag or keyboard event.
+    Wheel: zoom at the mouse. Right-button drag or arrow keys: pan. +/-: zoom at the center. Home: reset.
+    Returns:
+        True if the camera moved and the view has to be rebuilt.
+    """
+    if event.type == pygame.MOUSEWHEEL:
+        return camera.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+    if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+        camera.pan(*event.rel)
+        return True
+    if event.type == pygame.KEYDOWN:
+        arrows = {pygame.K_LEFT: (PAN_STEP, 0), pygame.K_RIGHT: (-PAN_STEP, 0),
+                  pygame.K_UP: (0, PAN_STEP), pygame.K_DOWN: (0, -PAN_STEP)}
+        if event.key in arrows:
+            camera.pan(*arrows[event.key])
+            return True
+        if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            return camera.zoom_at((WIDTH / 2, HEIGHT / 2), ZOOM_STEP)
+        if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            return camera.zoom_at((WIDTH / 2, HEIGHT / 2), 1 / ZOOM_STEP)
+        if event.key == pygame.K_HOME:
+            camera.reset()
+            return True
+    return False
+
+
+def get_node_from_position(mouse_pos, radius=CLICK_RADIUS):
     """
-    Returns the node corresponding to a given mouse position.
+    Returns the node corresponding to a given mouse position, under the current camera.
     Parameters:
-        mouse_pos: The (x, y) position of the mouse click.
-        radius: The radius within which a click is considered valid.
+        mouse_pos: The (x, y) screen position of the mouse click.
+        radius: The screen distance within which a click is considered valid.
     Returns:
-        The node if found, otherwise None.
+        The closest node within the radius if found, otherwise None.
     """
-    for node, coord in pos.items():
-        # Check if the mouse position is within the radius of the node
-        if (coord[0] - mouse_pos[0]) ** 2 + (coord[1] - mouse_pos[1]) ** 2 < radius ** 2:
-            return node  # Return the node if it matches
-    return None  # Return None if no match is found
+    # The index holds layout positions, so the click is mapped back into the world first
+    world_point = camera.to_world(mouse_pos)
+    return node_index.nearest(world_point, radius / camera.zoom)  # Only the grid cells around the mouse are checked
 
-def draw_button(text, x, y, width, height):
+def draw_button(text, x, y, width, height, surface=None):
     """
     Draws a rectangular button with text on the screen.
     Parameters:
         text: The label for the button.
         x, y: The top-left corner coordinates of the button.
         width, height: Dimensions of the button.
+        surface: Optional surface to draw on instead of the screen.
     """
-    pygame.draw.rect(screen, GRAY, (x, y, width, height))  # Draw the button background
-    pygame.draw.rect(screen, BLACK, (x, y, width, height), 2)  # Draw the button border
+    surface = surface or screen
+    pygame.draw.rect(surface, GRAY, (x, y, width, height))  # Draw the button background
+    pygame.draw.rect(surface, BLACK, (x, y, width, height), 2)  # Draw the button border
     label = FONT.render(text, True, BLACK)  # Render the button label
     label_rect = label.get_rect(center=(x + width / 2, y + height / 2))   # Position label at button center
-    screen.blit(label, label_rect)  # Draw the label on the button
+    surface.blit(label, label_rect)  # Draw the label on the button
 
 def is_button_clicked(x, y, width, height, mouse_pos):
     """
@@ -332,8 +621,10 @@ def display_popup(message, button_text, score):
 
     # Wait for player interaction
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:  # Handle game quit
+        for event in wait_for_events():
+            if is_expose_event(event):  # The window was uncovered
+                pygame.display.flip()  # Present the popup again
+            elif event.type == pygame.QUIT:  # Handle game quit
                 pygame.quit()
                 return "quit"
             elif event.type == pygame.MOUSEBUTTONDOWN:  # Handle button click
@@ -341,70 +632,139 @@ def display_popup(message, button_text, score):
                 if is_button_clicked(button_rect.x, button_rect.y, button_rect.width, button_rect.height, event.pos):
                     return "next"  # Return "next" to continue to the game
 
-def main():
+def main(fps=30, seed=None, layout_name="auto", pack_path=None, record_path=None, band=None, traffic=0):
     """
     Main function to run the game. Handles the game loop, user interactions, and level progression.
+    Parameters:
+        fps: Maximum number of times per second the game handles input and redraws.
+        seed: Optional seed of the play session; the same seed gives the same sequence of levels.
+        layout_name: The node layout, one of layout.LAYOUTS or "auto".
+        pack_path: Optional level pack file to play instead of generated levels.
+        record_path: Optional attempt log (see recording.py) that every finished attempt is appended to.
+        band: Optional (low, high) difficulty range generated levels must fall in (see difficulty.py).
+        traffic: Live traffic updates per second; every update changes a few edge weights. 0 turns it off.
+    Raises:
+        ValueError: If the level pack has no levels.
     """
+    global fps_cap, layout_kind, live_traffic
+    fps_cap = fps  # Apply the frame cap to every loop (intro, gameplay and popups)
+    layout_kind = layout_name
+    live_traffic = traffic > 0
+    if pack_path:
+        level_pool = LevelPack(pack_path)  # Play the levels stored in the pack, in order
+        if len(level_pool) == 0:  # Fail before the window opens rather than at the first level
+            level_pool.close()
+            raise ValueError(f"{pack_path} has no levels to play")
+    else:
+        # Generate and lay out upcoming levels while the player is busy
+        level_pool = LevelPool(base_seed=seed, band=band, layout_kind=layout_kind, width=WIDTH, height=HEIGHT)
+    init_display()  # Open the game window
+    level_pool.prefetch(1)  # Start on the first levels while the intro screen is shown
+    attempt_log = AttemptLog(record_path) if record_path else None
+    events = []  # Clicks and undos of the current attempt, for the attempt log
+
     # Show the intro screen and wait for user to start the game
     if not display_intro_screen():
+        level_pool.close()
+        if attempt_log:
+            attempt_log.close()
         return  # Exit if the player quits from the intro screen
 
     level = 1  # Start at level 1
     score = 0  # Initialize the player's score
+    if live_traffic:
+        traffic_rng = np.random.default_rng(seed)  # Weight changes are reproducible with --seed
+        pygame.time.set_timer(TRAFFIC_EVENT, max(1, int(1000 / traffic)))  # Change weights on a timer
     
     running = True  # Game is running
+    new_level = True  # False when the player retries, which keeps the graph and its live traffic weights
     while running:
-        # Set up the current level (generate graph, nodes, paths)
-        setup_level(level, reset_graph=True)
+        # Set up the current level; this is the only place a level is set up, so it happens once per level
+        if new_level:
+            setup_level(level, reset_graph=True, generated=level_pool.get(level))  # Use the pre-generated level
+        else:
+            setup_level(level, reset_graph=False)  # Retry the current level
+        draw_graph()  # Draw the full board once; later changes only repaint what they touch
         
-        while True:  # Inner loop for gameplay within a level
-            for event in pygame.event.get():  # Process player inputs
-                if event.type == pygame.QUIT:  # Check if the player wants to quit
+        level_over = False  # Set when the player moves on to the next level or retries
+        while not level_over:  # Inner loop for gameplay within a level
+            view_changed = False  # Camera moves are collected and applied once per batch of events
+            for event in wait_for_events():  # Sleep until the player does something, then process the inputs
+                if is_expose_event(event):  # The window was uncovered
+                    draw_graph()  # Repaint the whole board
+                elif event.type in (pygame.MOUSEWHEEL, pygame.MOUSEMOTION, pygame.KEYDOWN):  # Pan and zoom
+                    view_changed = move_camera(event) or view_changed
+                elif event.type == TRAFFIC_EVENT:  # Live traffic: some edges got faster or slower
+                    apply_traffic(engine.traffic_changes(state.graph, traffic_rng, TRAFFIC_EDGES))
+                elif event.type == pygame.QUIT:  # Check if the player wants to quit
                     # Properly exit the game
                     pygame.quit()  # Exit pygame
                     exit()  # Exit the program
                     
-                elif event.type == pygame.MOUSEBUTTONDOWN:  # Handle mouse click events
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Handle left mouse clicks
                     mouse_pos = pygame.mouse.get_pos()  # Get the position of the mouse click
                     # Check if the "Finish" button was clicked
-                    if is_button_clicked(650, 550, 100, 40, mouse_pos):
+                    if FINISH_BUTTON_RECT.collidepoint(mouse_pos):
                         # Check if the player's path is close to the shortest path
-                        if abs(total_path_weight[0] - shortest_path_length) <= 1:
-                            score += 10  # Award points for a correct path
+                        won = state.is_winning_path()
+                        if attempt_log:
+                            attempt_log.record(level, state, events, won)
+                        events = []  # The next attempt starts with a fresh event list
+                        if won:
+                            score += engine.WIN_POINTS  # Award points for a correct path
                             # Display a popup indicating the player won
                             result = display_popup("You won!", "Next", score)
                             if result == "next":  # If the player clicks "Next"
                                 level += 1  # Move to the next level
-                                setup_level(level, reset_graph=True)  # Set up the new level
-                                break  # Break out of inner loop to start the new level
+                                new_level, level_over = True, True
+                                break  # Leave the event loop; the outer loop sets up the new level
                         else:
                             # Display a popup indicating the player lost
                             result = display_popup("You lost!", "Retry", score)
                             if result == "next":  # If the player clicks "Retry"
-                                setup_level(level, reset_graph=False)  # Retry the current level
-                                break
+                                new_level, level_over = False, True
+                                break  # Leave the event loop; the outer loop resets the current level
                     # Check if the "Undo" button was clicked
-                    elif is_button_clicked(520, 550, 100, 40, mouse_pos):
-                        undo_last_selection()  # Undo the last node selection
+                    elif UNDO_BUTTON_RECT.collidepoint(mouse_pos):
+                        removed_edge = state.undo_last_selection()  # Undo the last node selection
+                        events.append(UNDO)
+                        if removed_edge:
+                            redraw_edges([removed_edge])  # Repaint only the removed edge and its nodes
                     # Check if the "Show/Hide Solution" button was clicked
-                    elif is_button_clicked(WIDTH - 150, 10, 100, 40, mouse_pos):
-                        global show_solution
-                        show_solution = not show_solution  # Toggle solution visibility
+                    elif SOLUTION_BUTTON_RECT.collidepoint(mouse_pos):  # The whole drawn button, 130 pixels wide
+                        toggle_solution()  # Toggle solution visibility and repaint the solution edges
                     else:
                         # Handle clicking on a graph node
                         node = get_node_from_position(mouse_pos)  # Get the clicked node
                         if node is not None:  # If a valid node was clicked
+                            events.append(node)
                             # Determine the last selected node or start node
-                            last_node = selected_path[-1] if selected_path else start_node
-                            handle_click_on_node(node, last_node)  # Process the node click
-
-            draw_graph()  # Redraw the graph and update the display
-
+                            last_node = state.last_selected_node()
+                            if state.handle_click_on_node(node, last_node):  # Process the node click
+                                redraw_edges([(last_node, node)])  # Repaint only the new edge and its nodes
+            if view_changed and not level_over:
+                update_view()  # Cull and pre-render the board for the new camera
+                draw_graph()
 
         if not running:  # Exit the main loop if the game is no longer running
             break
 
+    level_pool.close()  # Stop generating levels in the background or close the pack
+    if attempt_log:
+        attempt_log.close()
     pygame.quit()  # Quit pygame when the game loop ends
 
 if __name__ == "__main__":
-    main()  # Run the main function if this script is executed directly
+    parser = argparse.ArgumentParser(description="Pathfinder Quest")
+    parser.add_argument("--fps", type=int, default=30, help="maximum frames per second, 0 for no cap (default: 30)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the play session, to replay the same levels")
+    parser.add_argument("--layout", choices=["auto"] + sorted(layout.LAYOUTS), default="auto",
+                        help="node layout; auto uses a circle for small levels and force-directed for large ones")
+    parser.add_argument("--pack", default=None, help="level pack file to play (see level_pack.py)")
+    parser.add_argument("--band", type=float, nargs=2, metavar=("LOW", "HIGH"), default=None,
+                        help="only play generated levels with a difficulty in this range (see difficulty.py)")
+    parser.add_argument("--traffic", type=float, default=0,
+                        help="live traffic: edge weight updates per second while playing (default: 0, off)")
+    parser.add_argument("--record", default=None, help="append every finished attempt to this log (see recording.py)")
+    args = parser.parse_args()
+    main(fps=args.fps, seed=args.seed, layout_name=args.layout, pack_path=args.pack, record_path=args.record, band=args.band, traffic=args.traffic)  # Run the main function if this script is executed directly
@@ -0,0 +1,248 @@
+# Node layouts for Pathfinder Quest.
+# Every layout is computed with NumPy array operations and returns an (n, 2) float array of positions,
+# indexed by node. The positions are world coordinates that fill the screen at zoom 1; they are kept as
+# floats so nodes closer than a pixel stay apart when zoomed in, and only the camera rounds them to pixels.
+# Layouts are cached by level seed, so replays and retries skip the work.
+import threading  # Levels are laid out on background workers as well as on the game's thread
+from collections import OrderedDict  # Ordered dict used as a small LRU cache
+
+import numpy as np  # Library for fast array operations
+
+CACHE_SIZE = 64  # Number of layouts kept in the cache
+CIRCULAR_MAX_NODES = 20  # "auto" uses the circular layout up to this many nodes, force-directed above
+
+_layout_cache = OrderedDict()  # (seed, kind, nodes, width, height, padding) -> positions
+_cache_lock = threading.Lock()  # Guards _layout_cache; layouts themselves are computed outside it
+
+
+def fit_to_screen(points, width, height, padding=100):
+    """
+    Scales and centers positions so they fill the screen, keeping their aspect ratio.
+    Parameters:
+        points: (n, 2) float array of positions in any coordinate system.
+        width, height: The screen dimensions.
+        padding: Distance to keep between the nodes and the screen edges.
+    Returns:
+        An (n, 2) float array of positions.
+    """
+    points = np.asarray(points, dtype=float)
+    low, high = points.min(axis=0), points.max(axis=0)
+    span = np.maximum(high - low, 1e-9)
+    scale = min((width - 2 * padding) / span[0], (height - 2 * padding) / span[1])
+    centered = (points - (low + high) / 2) * scale
+    return centered + [width / 2, height / 2]
+
+
+def circular_layout(nodes_count, width, height, padding=100):
+    """
+    Places the nodes evenly on a circle that fits within the screen dimensions.
+    Parameters:
+        nodes_count: The number of nodes.
+        width, height: The screen dimensions.
+        padding: Distance to keep between the nodes and the screen edges.
+    Returns:
+        An (n, 2) float array of positions.
+    """
+    angles = np.arange(nodes_count) * (2 * np.pi / max(nodes_count, 1))
+    scale = min(width, height) / 2 - padding  # Scale to fit within the screen with padding
+    return np.column_stack([np.cos(angles), np.sin(angles)]) * scale + [width / 2, height / 2]
+
+
+def grid_layout(nodes_count, width, height, padding=100):
+    """
+    Places the nodes row by row on a regular grid that fills the screen.
+    Parameters:
+        nodes_count: The number of nodes.
+        width, height: The screen dimensions.
+        padding: Distance to keep between the nodes and the screen edges.
+    Returns:
+        An (n, 2) float array of positions.
+    """
+    columns = max(1, int(np.ceil(np.sqrt(nodes_count * (width - 2 * padding) / max(height - 2 * padding, 1)))))
+    rows = max(1, int(np.ceil(nodes_count / columns)))
+    index = np.arange(nodes_count)
+    step_x = (width - 2 * padding) / max(columns - 1, 1)
+    step_y = (height - 2 * padding) / max(rows - 1, 1)
+    return np.column_stack([padding + (index % columns) * step_x, padding + (index // columns) * step_y])
+
+
+def _neighbor_pairs(cells):
+    """
+    Finds all pairs of points in the same or adjacent grid cells.
+    Parameters:
+        cells: (n, 2) integer array with the grid cell of every point.
+    Returns:
+        Two arrays (i, j) of point indices with i != j; every close pair appears in both orders.
+    """
+    columns = cells[:, 1].max() + 3  # Room for the offsets below without wrapping
+    cell_ids = (cells[:, 0] + 1) * columns + (cells[:, 1] + 1)
+    order = np.argsort(cell_ids, kind="stable")
+    sorted_ids = cell_ids[order]
+
+    pairs_i, pairs_j = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            # Range of the sorted points that lie in the neighboring cell of every point
+            target = cell_ids + dx * columns + dy
+            first = np.searchsorted(sorted_ids, target, side="left")
+            counts = np.searchsorted(sorted_ids, target, side="right") - first
+            total = counts.sum()
+            if total == 0:
+                continue
+            i = np.repeat(np.arange(len(cells)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            j = order[np.repeat(first, counts) + offsets]
+            keep = i != j
+            pairs_i.append(i[keep])
+            pairs_j.append(j[keep])
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def _repulsion(points, k2):
+    """
+    Approximates the repulsive force k^2 / d that every node feels from all other nodes.
+    A hierarchy of grids over the bounding square is used, as in Barnes-Hut: at each level a node is pushed
+    by the centers of mass of the cells that are not adjacent to its own cell but are children of cells adjacent
+    to its parent. Nodes in the same or adjacent cells of the finest level are handled exactly.
+    With about 27 cells per level and log(n) levels this costs O(n log n) instead of O(n^2).
+    Parameters:
+        points: (n, 2) float array of positions.
+        k2: The squared ideal node distance.
+    Returns:
+        An (n, 2) array with the repulsive displacement of every node.
+    """
+    nodes_count = len(points)
+    low = points.min(axis=0)
+    size = max(float(np.ptp(points, axis=0).max()), 1e-9)
+    relative = (points - low) / size  # Positions in the unit square
+    finest = max(2, int(np.ceil(np.log(max(nodes_count, 4) / 2) / np.log(4))))  # About two nodes per finest cell
+    displacement = np.zeros_like(points)
+
+    for level in range(2, finest + 1):
+        side = 2 ** level  # Cells per side at this level
+        cells = np.minimum((relative * side).astype(np.int64), side - 1)
+        ids = cells[:, 0] * side + cells[:, 1]
+        mass = np.bincount(ids, minlength=side * side).astype(float)
+        center_x = np.bincount(ids, points[:, 0], side * side) / np.maximum(mass, 1)
+        center_y = np.bincount(ids, points[:, 1], side * side) / np.maximum(mass, 1)
+        base = (cells // 2) * 2 - 2  # First cell of the 6x6 block made of the children of the parent's neighbors
+        for a in range(6):
+            target_x = base[:, 0] + a
+            for b in range(6):
+                target_y = base[:, 1] + b
+                far = (np.abs(target_x - cells[:, 0]) > 1) | (np.abs(target_y - cells[:, 1]) > 1)
+                valid = far & (target_x >= 0) & (target_x < side) & (target_y >= 0) & (target_y < side)
+                target = np.where(valid, target_x * side + target_y, 0)
+                weight = np.where(valid, mass[target], 0.0)
+                dx = points[:, 0] - center_x[target]
+                dy = points[:, 1] - center_y[target]
+                factor = k2 * weight / np.maximum(dx * dx + dy * dy, 1e-12)
+                displacement[:, 0] += factor * dx
+                displacement[:, 1] += factor * dy
+
+    # Exact repulsion between nodes in the same or adjacent finest cells
+    side = 2 ** finest
+    i, j = _neighbor_pairs(np.minimum((relative * side).astype(np.int64), side - 1))
+    delta = points[i] - points[j]
+    factor = k2 / np.maximum((delta ** 2).sum(axis=1), 1e-12)
+    displacement[:, 0] += np.bincount(i, factor * delta[:, 0], nodes_count)
+    displacement[:, 1] += np.bincount(i, factor * delta[:, 1], nodes_count)
+    return displacement
+
+
+def force_directed_layout(graph, width, height, padding=100, iterations=60, seed=None):
+    """
+    Spring layout (Fruchterman-Reingold) for large graphs. Edges pull their nodes together and nodes push
+    each other apart; the repulsion uses a grid approximation (see _repulsion) so every iteration costs
+    O(n log n) instead of O(n^2).
+    Parameters:
+        graph: The CompactGraph to lay out.
+        width, height: The screen dimensions.
+        padding: Distance to keep between the nodes and the screen edges.
+        iterations: Number of simulation steps.
+        seed: Seed for the random starting positions.
+    Returns:
+        An (n, 2) float array of positions.
+    """
+    nodes_count = graph.number_of_nodes()
+    if nodes_count < 3:
+        return circular_layout(nodes_count, width, height, padding)
+    rng = np.random.default_rng(seed)
+    points = rng.random((nodes_count, 2))  # Start from random positions in the unit square
+    k = 1.0 / np.sqrt(nodes_count)  # Ideal distance between nodes
+    temperature = 0.1  # Largest move a node can make in one step, cooled down every step
+    cooling = temperature / (iterations + 1)
+    edge_u, edge_v = graph.edge_u.astype(np.int64), graph.edge_v.astype(np.int64)
+
+    for _ in range(iterations):
+        displacement = _repulsion(points, k * k)  # Nodes push each other apart
+
+        # Attraction along edges: d^2 / k, pulling the two ends together
+        delta = points[edge_u] - points[edge_v]
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        force = (dist / k)[:, None] * delta
+        displacement[:, 0] += np.bincount(edge_v, force[:, 0], nodes_count) - np.bincount(edge_u, force[:, 0], nodes_count)
+        displacement[:, 1] += np.bincount(edge_v, force[:, 1], nodes_count) - np.bincount(edge_u, force[:, 1], nodes_count)
+
+        # Move every node along its displacement, by at most the current temperature
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        points += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return fit_to_screen(points, width, height, padding)
+
+
+# Layouts by name; every function takes (graph, width, height, padding, seed)
+LAYOUTS = {
+    "circular": lambda graph, width, height, padding, seed: circular_layout(graph.number_of_nodes(), width, height, padding),
+    "grid": lambda graph, width, height, padding, seed: grid_layout(graph.number_of_nodes(), width, height, padding),
+    "force": lambda graph, width, height, padding, seed: force_directed_layout(graph, width, height, padding, seed=seed),
+}
+
+
+def compute_layout(graph, width, height, kind="auto", padding=100, seed=None):
+    """
+    Computes node positions with the named layout.
+    Parameters:
+        graph: The CompactGraph to lay out.
+        width, height: The screen dimensions.
+        kind: One of LAYOUTS, or "auto" for circular on small graphs and force-directed on large ones.
+        padding: Distance to keep between the nodes and the screen edges.
+        seed: Seed for layouts with a random component.
+    Returns:
+        An (n, 2) float array of positions.
+    """
+    if kind == "auto":
+        kind = "circular" if graph.number_of_nodes() <= CIRCULAR_MAX_NODES else "force"
+    if kind not in LAYOUTS:
+        raise ValueError(f"unknown layout {kind!r}, expected one of {sorted(LAYOUTS)} or 'auto'")
+    return LAYOUTS[kind](graph, width, height, padding, seed)
+
+
+def cached_layout(graph, seed, width, height, kind="auto", padding=100):
+    """
+    Returns the layout of a level, computing it only the first time the level's seed is seen.
+    Parameters:
+        graph: The CompactGraph to lay out.
+        seed: The seed the level was generated from; it identifies the graph in the cache.
+        width, height: The screen dimensions.
+        kind: The layout name, as for compute_layout.
+        padding: Distance to keep between the nodes and the screen edges.
+    Returns:
+        An (n, 2) float array of positions. The array is shared with the cache; do not modify it.
+    """
+    key = (seed, kind, graph.number_of_nodes(), width, height, padding)
+    if seed is not None:
+        with _cache_lock:
+            if key in _layout_cache:
+                _layout_cache.move_to_end(key)  # Mark as recently used
+                return _layout_cache[key]
+    positions = compute_layout(graph, width, height, kind, padding, seed)
+    if seed is not None:
+        with _cache_lock:
+            _layout_cache[key] = positions
+            if len(_layout_cache) > CACHE_SIZE:
+                _layout_cache.popitem(last=False)  # Drop the least recently used layout
+    return positions
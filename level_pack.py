@@ -0,0 +1,244 @@
+# Binary level packs for Pathfinder Quest.
+# A level pack stores many levels (edges, weights, node positions, start/end nodes and the precomputed
+# solution) in one file. The file is opened with mmap, so opening a pack with thousands of levels is
+# instant and only the pages of the levels that are actually played are read from disk.
+#
+# File layout (little-endian):
+#   header  magic "PFQPACK\0", version, level count, screen width and height, index offset (see HEADER)
+#   levels  per level: int32 edge_u[edges], edge_v[edges], weights[edges], float32 positions[nodes * 2]
+#           and int32 solution[hops + 1]; every level starts on an 8-byte boundary
+#   index   one INDEX_ENTRY per level, after the last level so levels can be written as they are generated
+#
+# Usage:
+#   python level_pack.py build levels.pfq --count 1000 --seed 1
+#   python level_pack.py build big.pfq --count 100 --nodes 5000 --layout force
+#   python level_pack.py info levels.pfq
+import argparse  # Library for reading command-line options
+import mmap  # Memory-mapped file access
+import random  # Library for generating random numbers
+
+import numpy as np  # Library for fast array operations
+
+import engine  # Level generation and the Level record
+import layout  # Node positions stored with every level
+from compact_graph import CompactGraph  # Graph type of the loaded levels
+from solvers import shortest_path_tree  # Precomputed solutions
+
+MAGIC = b"PFQPACK\0"
+VERSION = 3
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("count", "<u4"), ("width", "<u4"), ("height", "<u4"),
+                   ("index", "<u8")])  # Position of the index in the file
+INDEX_ENTRY = np.dtype([
+    ("offset", "<u8"),  # Position of the level's arrays in the file
+    ("level", "<u4"),  # Level number the level was generated for
+    ("seed", "<u8"),  # Seed the level was generated from
+    ("nodes", "<u4"),
+    ("edges", "<u4"),
+    ("start", "<u4"),
+    ("end", "<u4"),
+    ("length", "<u8"),  # Total weight of the shortest path
+    ("hops", "<u4"),  # Number of edges on the stored shortest path
+])
+# Types of the arrays stored for every level; all are 4 bytes wide. Positions stay floats so nodes closer than
+# a pixel can still be told apart when the game zooms in.
+LEVEL_DTYPES = ["<i4", "<i4", "<i4", "<f4", "<i4"]  # edge_u, edge_v, weights, positions, solution
+
+
+def _level_arrays(level, width, height, layout_kind):
+    """
+    Computes everything stored for one level.
+    Returns:
+        A tuple (index entry values, list of little-endian arrays to write, in LEVEL_DTYPES order).
+    """
+    graph = level.graph
+    positions = level.positions
+    if positions is None:
+        positions = layout.compute_layout(graph, width, height, layout_kind, seed=level.seed)
+    distance, next_hop = shortest_path_tree(graph, level.end_node)
+    solution = [level.start_node]  # Follow the next hops from the start node to the end node
+    while solution[-1] != level.end_node:
+        solution.append(int(next_hop[solution[-1]]))
+    entry = (0, level.level, level.seed, graph.number_of_nodes(), graph.number_of_edges(),
+             level.start_node, level.end_node, int(distance[level.start_node]), len(solution) - 1)
+    arrays = [graph.edge_u, graph.edge_v, graph.weights, np.asarray(positions).reshape(-1), solution]
+    return entry, [np.asarray(array, dtype=dtype) for array, dtype in zip(arrays, LEVEL_DTYPES)]
+
+
+def write_pack(path, levels, width=800, height=600, layout_kind="auto"):
+    """
+    Writes levels to a level pack file.
+    Levels are written one at a time as the iterable yields them and are not kept, so memory use does not
+    grow with the number of levels; pass a generator to build large packs.
+    Parameters:
+        path: The file to write.
+        levels: Iterable of engine.Level records; levels without positions are laid out with `layout_kind`.
+        width, height: The screen dimensions the positions are computed for.
+        layout_kind: The layout used for levels without positions.
+    Returns:
+        The number of levels written.
+    """
+    entries = []  # Index entries only; the level data is on disk as soon as it is computed
+    with open(path, "wb") as file:
+        file.write(b"\0" * HEADER.itemsize)  # Reserve room for the header, written once the index offset is known
+        for level in levels:
+            file.write(b"\0" * (-file.tell() % 8))  # Align every level to 8 bytes
+            entry, arrays = _level_arrays(level, width, height, layout_kind)
+            entries.append((file.tell(),) + entry[1:])
+            for array in arrays:
+                file.write(array.tobytes())
+        file.write(b"\0" * (-file.tell() % 8))
+        index_offset = file.tell()
+        file.write(np.array(entries, dtype=INDEX_ENTRY).tobytes())
+        file.seek(0)
+        file.write(np.array([(MAGIC, VERSION, len(entries), width, height, index_offset)], dtype=HEADER).tobytes())
+    return len(entries)
+
+
+def build_pack(path, count, base_seed=None, first_level=1, nodes_count=None, width=800, height=600,
+               layout_kind="auto"):
+    """
+    Generates levels with engine.generate_level and writes them to a level pack.
+    Level i of the pack is generated for level number first_level + i from a seed derived from base_seed,
+    the same way a LevelPool derives them, so a pack can reproduce a play session.
+    Parameters:
+        path: The file to write.
+        count: The number of levels.
+        base_seed: Seed the level seeds are derived from; a random one is picked when it is None.
+        first_level: Level number of the first level.
+        nodes_count: Optional number of nodes for every level, overriding the level-based size.
+        width, height: The screen dimensions the positions are computed for.
+        layout_kind: The node layout, one of layout.LAYOUTS or "auto".
+    Returns:
+        The base seed used.
+    """
+    if base_seed is None:
+        base_seed = random.randrange(2 ** 32)
+    levels = (engine.generate_level(number, engine.level_seed(base_seed, number), nodes_count)
+              for number in range(first_level, first_level + count))
+    write_pack(path, levels, width, height, layout_kind)
+    return base_seed
+
+
+class LevelPack:
+    """
+    Read-only view of a level pack file. Levels are read from the memory-mapped file only when asked for.
+    Attributes:
+        index: Structured array with one INDEX_ENTRY per level (seeds, sizes, solution lengths, ...).
+        width, height: The screen dimensions the positions were computed for.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a level pack.
+        Raises:
+            ValueError: If the file is not a level pack or has an unsupported version.
+        """
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.itemsize:
+            self._map.close()
+            raise ValueError(f"{path} is not a level pack")
+        header = np.frombuffer(self._map, dtype=HEADER, count=1).copy()[0]
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a level pack")
+        if header["version"] != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} has unsupported level pack version {header['version']}")
+        self.width, self.height = int(header["width"]), int(header["height"])
+        # The index is small, so it is copied out of the map; level data stays on disk until it is used
+        self.index = np.frombuffer(self._map, dtype=INDEX_ENTRY, count=int(header["count"]),
+                                   offset=int(header["index"])).copy()
+
+    def __len__(self):
+        return len(self.index)
+
+    def _arrays(self, i):
+        """Returns copies of the arrays of level i, in file order."""
+        entry = self.index[i]
+        nodes, edges, hops = int(entry["nodes"]), int(entry["edges"]), int(entry["hops"])
+        sizes = [edges, edges, edges, nodes * 2, hops + 1]
+        data = np.frombuffer(self._map, dtype="<i4", count=sum(sizes), offset=int(entry["offset"]))
+        bounds = np.cumsum([0] + sizes)
+        return [data[bounds[k]:bounds[k + 1]].view(LEVEL_DTYPES[k]).copy() for k in range(len(sizes))]
+
+    def __getitem__(self, i):
+        """
+        Loads level i of the pack.
+        Returns:
+            An engine.Level with the stored node positions.
+        """
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"level pack has {len(self)} levels")
+        entry = self.index[i]
+        edge_u, edge_v, weights, positions, _ = self._arrays(i)
+        graph = CompactGraph(int(entry["nodes"]), edge_u, edge_v, weights)
+        return engine.Level(int(entry["level"]), int(entry["seed"]), graph, int(entry["start"]), int(entry["end"]),
+                            positions.reshape(-1, 2).astype(np.float64))
+
+    def solution(self, i):
+        """
+        Returns the stored shortest path of level i as a tuple (list of nodes, total weight).
+        """
+        return self._arrays(i)[4].tolist(), int(self.index[i]["length"])
+
+    def get(self, level):
+        """
+        Returns the pack entry to play for a level number, cycling through the pack.
+        Has the same signature as LevelPool.get, so the game can play from either.
+        Raises:
+            ValueError: If the pack has no levels.
+        """
+        if len(self) == 0:
+            raise ValueError("level pack has no levels to play")
+        return self[(level - 1) % len(self)]
+
+    def prefetch(self, level):
+        """Nothing to do: the levels are already generated. Kept for the LevelPool interface."""
+
+    def close(self):
+        """Closes the memory-mapped file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect Pathfinder Quest level packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="generate levels from seeds and write them to a pack")
+    build.add_argument("path", help="the level pack file to write")
+    build.add_argument("--count", type=int, default=100, help="number of levels (default: 100)")
+    build.add_argument("--seed", type=int, default=None, help="base seed the level seeds are derived from")
+    build.add_argument("--first-level", type=int, default=1, help="level number of the first level (default: 1)")
+    build.add_argument("--nodes", type=int, default=None, help="nodes per level instead of the level-based size")
+    build.add_argument("--layout", choices=["auto"] + sorted(layout.LAYOUTS), default="auto",
+                       help="node layout stored with every level")
+    build.add_argument("--width", type=int, default=800, help="screen width the layout is computed for")
+    build.add_argument("--height", type=int, default=600, help="screen height the layout is computed for")
+
+    info = commands.add_parser("info", help="print a summary of a pack")
+    info.add_argument("path", help="the level pack file to read")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        seed = build_pack(args.path, args.count, args.seed, args.first_level, args.nodes,
+                          args.width, args.height, args.layout)
+        print(f"Wrote {args.count} levels to {args.path} (base seed {seed})")
+    else:
+        with LevelPack(args.path) as pack:
+            index = pack.index
+            print(f"{args.path}: {len(pack)} levels for a {pack.width}x{pack.height} screen")
+            if len(pack):
+                print(f"  nodes per level: {index['nodes'].min()} to {index['nodes'].max()}")
+                print(f"  edges per level: {index['edges'].min()} to {index['edges'].max()}")
+                print(f"  shortest path length: {index['length'].min()} to {index['length'].max()}")
+
+
+if __name__ == "__main__":
+    main()
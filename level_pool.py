@@ -0,0 +1,104 @@
+# Background pre-generation of levels.
+# While the player solves the current level, the next few levels are generated on a worker,
+# so moving to the next level does not have to wait for level generation.
+import random  # Library for generating random numbers
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # Workers for background generation
+
+import engine  # Level generation
+import layout  # Node positions, computed along with the level
+from difficulty import generate_graded_level  # Keeps only levels inside a difficulty band
+
+
+def generate_pooled_level(level, seed, nodes_count=None, band=None, layout_kind=None, width=800, height=600):
+    """
+    Generates a level and, when a layout is asked for, lays it out too. Runs on the pool's worker.
+    Returns:
+        An engine.Level, with positions when layout_kind is not None.
+    """
+    generated = generate_graded_level(level, seed, nodes_count, band)
+    if layout_kind is None:
+        return generated
+    return generated._replace(positions=layout.cached_layout(generated.graph, generated.seed, width, height,
+                                                             layout_kind))
+
+
+class LevelPool:
+    """
+    Keeps the next few levels of a play session generated in the background.
+    Every level is generated from a seed derived from the session seed, so a session can be replayed.
+    """
+
+    def __init__(self, base_seed=None, depth=3, executor=None, nodes_count=None, band=None, layout_kind=None,
+                 width=800, height=600):
+        """
+        Parameters:
+            base_seed: Seed of the play session; a random one is picked when it is None.
+            depth: How many levels ahead of the current one to keep generated.
+            executor: Optional concurrent.futures executor (e.g. a ProcessPoolExecutor for large graphs).
+                When it is None, a single background thread is used, or one process per level kept ahead
+                when a band is given.
+            nodes_count: Optional number of nodes for every level, overriding the level-based size.
+            band: Optional (low, high) difficulty range (see difficulty.py); candidates are generated and
+                graded in the background until one fits.
+            layout_kind: Optional layout (one of layout.LAYOUTS or "auto") computed in the background too, so
+                levels come with their positions; large levels take seconds to lay out.
+            width, height: The screen dimensions the positions are computed for.
+        """
+        self.base_seed = random.randrange(2 ** 32) if base_seed is None else base_seed
+        self.depth = depth
+        self.nodes_count = nodes_count
+        self.band = band
+        self.layout_kind = layout_kind
+        self.width, self.height = width, height
+        self._owns_executor = executor is None
+        if executor is None and band is not None:
+            # Grading tries up to GRADED_ATTEMPTS candidates per level; in processes the upcoming levels are
+            # graded side by side and never hold the GIL the game's own thread needs
+            executor = ProcessPoolExecutor(max_workers=depth)
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-pool")
+        self._pending = {}  # Level number -> future of the generated Level
+
+    def _schedule(self, level):
+        """Starts generating a level unless it is already generated or being generated."""
+        if level not in self._pending:
+            seed = engine.level_seed(self.base_seed, level)
+            self._pending[level] = self._executor.submit(generate_pooled_level, level, seed, self.nodes_count,
+                                                         self.band, self.layout_kind, self.width, self.height)
+
+    def prefetch(self, level):
+        """
+        Starts generating `depth` levels in the background, beginning with the given one.
+        """
+        for upcoming in range(level, level + self.depth):
+            self._schedule(upcoming)
+
+    def get(self, level):
+        """
+        Returns the generated level, waiting for it if it is not finished yet,
+        and starts generating the levels that follow it.
+        Parameters:
+            level: The level number.
+        Returns:
+            An engine.Level.
+        """
+        self._schedule(level)
+        future = self._pending.pop(level)
+        # Levels before this one will not be asked for any more
+        for old in [old for old in self._pending if old < level]:
+            self._pending.pop(old).cancel()
+        self.prefetch(level + 1)
+        return future.result()
+
+    def close(self):
+        """Stops background generation and shuts the worker down if the pool created it."""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
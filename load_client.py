@@ -0,0 +1,132 @@
+# Load generator for the Pathfinder Quest server.
+# Keeps many sessions running at once; each session connects, starts a level, plays it along the hinted
+# shortest path, presses Finish and quits. Reports completed sessions per second and click-to-response latency.
+#
+# Usage:
+#   python load_client.py --sessions 200 --duration 10
+#   python load_client.py --unix /tmp/pathfinder.sock --sessions 500 --nodes 2000
+import argparse  # Library for reading command-line options
+import asyncio  # Runs all sessions concurrently
+import json  # Wire format
+import time  # Latency measurement
+
+import numpy as np  # Percentiles of the latencies
+
+MAX_LINE = 2 ** 26  # Level descriptions can be long when the graph is included
+
+
+class Connection:
+    """A client connection speaking the server's line-delimited JSON protocol."""
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.next_id = 0
+
+    async def request(self, **request):
+        """
+        Sends a request and waits for its response.
+        Raises:
+            RuntimeError: If the server reports an error.
+        """
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "connection closed"))
+        return response
+
+    def close(self):
+        """Ends the session and closes the connection."""
+        self.writer.write(b'{"cmd": "quit"}\n')
+        self.writer.close()
+
+
+async def connect(host, port, unix_path):
+    """Opens a connection to the server over TCP or a Unix socket."""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path, limit=MAX_LINE)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    return Connection(reader, writer)
+
+
+async def play_session(address, nodes_count, levels, click_latencies):
+    """
+    Plays one session: connects, starts a level, plays `levels` levels along the hinted shortest path and quits.
+    Parameters:
+        address: (host, port, unix_path) of the server.
+        nodes_count: Optional level size to ask for.
+        levels: Number of levels to play.
+        click_latencies: List the latency of every click is appended to, in seconds.
+    """
+    connection = await connect(*address)
+    try:
+        request = {"cmd": "new", "graph": False}
+        if nodes_count:
+            request["nodes"] = nodes_count
+        await connection.request(**request)
+        for _ in range(levels):
+            # Follow the hints to the end node, timing every click
+            node = (await connection.request(cmd="hint"))["node"]
+            while node is not None:
+                sent = time.perf_counter()
+                await connection.request(cmd="click", node=node)
+                click_latencies.append(time.perf_counter() - sent)
+                node = (await connection.request(cmd="hint"))["node"]
+            await connection.request(cmd="finish")  # A win also loads the next level
+    finally:
+        connection.close()
+
+
+async def run_worker(address, deadline, nodes_count, levels, click_latencies):
+    """
+    Plays sessions one after another until the deadline.
+    Returns:
+        The number of sessions completed.
+    """
+    completed = 0
+    while time.perf_counter() < deadline:
+        await play_session(address, nodes_count, levels, click_latencies)
+        completed += 1
+    return completed
+
+
+async def run_load(concurrency, duration, nodes_count, levels, host, port, unix_path):
+    """
+    Keeps `concurrency` sessions running at all times for `duration` seconds.
+    Returns:
+        A tuple (completed sessions, elapsed seconds, list of click latencies in seconds).
+    """
+    click_latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    results = await asyncio.gather(*(run_worker((host, port, unix_path), deadline, nodes_count, levels, click_latencies)
+                                     for _ in range(concurrency)))
+    return sum(results), time.perf_counter() - start, click_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load on a Pathfinder Quest server")
+    parser.add_argument("--host", default="127.0.0.1", help="server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="server TCP port (default: 8765)")
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent sessions (default: 100)")
+    parser.add_argument("--levels", type=int, default=1, help="levels played per session (default: 1)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes per level instead of the level-based size")
+    args = parser.parse_args()
+
+    completed, elapsed, latencies = asyncio.run(
+        run_load(args.sessions, args.duration, args.nodes, args.levels, args.host, args.port, args.unix))
+    print(f"{args.sessions} concurrent sessions, {elapsed:.1f} s")
+    print(f"  sessions completed: {completed} ({completed / elapsed:.1f} per second)")
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"  clicks: {len(latencies)} ({len(latencies) / elapsed:.0f} per second)")
+        print(f"  click latency: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Recording and batch analysis of player attempts.
+# Every finished attempt (level seed, clicks, undos, final path and the Finish result) is appended to a log.
+# The analyzer loads millions of attempts at once and re-scores them with NumPy array operations
+# instead of replaying the clicks one by one or regenerating the levels.
+#
+# A log is two append-only files: PATH holds one fixed-size RECORD per attempt, and PATH.data holds the
+# int32 click events (node id, or UNDO), the final path and the weight of every step of that path
+# (as it was when Finish was pressed, so live traffic is included) of every attempt; RECORD.offset points
+# into it.
+#
+# Usage:
+#   python game.py --record attempts.log
+#   python server.py --record attempts.log
+#   python recording.py attempts.log
+import argparse  # Library for reading command-line options
+import os  # File sizes
+import time  # Timestamps of the attempts
+
+import numpy as np  # Library for fast array operations
+
+import engine  # The scoring tolerance
+
+UNDO = -1  # Event value recorded for an Undo press
+NO_EDGE = -1  # Step weight recorded for a path step that is not an edge of the level
+RECORD = np.dtype([
+    ("time", "<f8"),  # When the attempt was finished (seconds since the epoch)
+    ("seed", "<u8"),  # Seed the level was generated from
+    ("level", "<u4"),  # Level number
+    ("nodes", "<u4"),  # Number of nodes of the level
+    ("start", "<u4"),
+    ("end", "<u4"),
+    ("shortest", "<u4"),  # Shortest path length of the level
+    ("total", "<i4"),  # Total weight of the submitted path
+    ("won", "u1"),  # Result of the Finish check when the attempt was played
+    ("offset", "<u8"),  # Position of the attempt's events in the data file, in int32 units
+    ("events", "<u4"),  # Number of click and undo events
+    ("path", "<u4"),  # Number of nodes in the submitted path
+])
+
+
+class AttemptLog:
+    """
+    Append-only writer for attempt records. One log can be shared by many sessions in a process, and by
+    several processes (e.g. game instances on one machine) writing to the same files.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) a log for appending.
+        Parameters:
+            path: The record file; the event data goes to path + ".data".
+        """
+        self.path = path
+        # Unbuffered, so every attempt's data and record each go to the file in a single write() call
+        self._records = open(path, "ab", buffering=0)
+        self._data = open(path + ".data", "ab", buffering=0)
+        # A crash can leave a partly written record or value at the end; cut it off so new records
+        # start at the right place again. Whole files are left alone, since other writers may be appending.
+        for file, unit in ((self._records, RECORD.itemsize), (self._data, 4)):
+            size = os.fstat(file.fileno()).st_size
+            if size % unit:
+                file.truncate(size - size % unit)
+
+    def record(self, level, state, events, won):
+        """
+        Appends one finished attempt.
+        Parameters:
+            level: The level number.
+            state: The engine.GameState at the moment Finish was pressed.
+            events: The attempt's clicked nodes, with UNDO for every Undo press.
+            won: The result of the Finish check.
+        """
+        path = state.selected_path
+        # The weight of every step with the weights of the moment, so the log can be re-scored without the level
+        ids = state.graph.edge_ids(([state.start_node] + path)[:-1], path)
+        weights = np.where(ids >= 0, state.graph.weights[np.maximum(ids, 0)], NO_EDGE)
+        data = np.concatenate([np.asarray(list(events) + list(path), dtype="<i4"), weights.astype("<i4")]).tobytes()
+        # The data is written before the record that points to it, so a crash never leaves a dangling record.
+        # An append always lands at the current end of the file, even when other processes append to the same
+        # log, and leaves the file position right after it, so the position tells where this data starts.
+        self._data.write(data)
+        offset = (self._data.tell() - len(data)) // 4
+        record = np.array([(time.time(), state.seed, level, state.graph.number_of_nodes(), state.start_node,
+                            state.end_node, state.shortest_path_length, state.total_path_weight, won,
+                            offset, len(events), len(path))], dtype=RECORD)
+        self._records.write(record.tobytes())
+
+    def close(self):
+        self._records.close()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_attempts(path):
+    """
+    Loads a whole attempt log.
+    Returns:
+        A tuple (records, data): the RECORD array and the int32 event/path data it points into.
+        A record cut short by a crash at the end of the file is ignored.
+    """
+    size = os.path.getsize(path) // RECORD.itemsize
+    records = np.fromfile(path, dtype=RECORD, count=size)
+    data = np.fromfile(path + ".data", dtype="<i4")
+    return records, data
+
+
+def _ragged(starts, lengths):
+    """
+    Returns the flat indices of the slices data[starts[i]:starts[i] + lengths[i]] and the slice each belongs to.
+    """
+    starts, lengths = np.asarray(starts, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    first = np.cumsum(lengths) - lengths  # Where each slice starts in the flat output
+    return np.repeat(starts - first, lengths) + np.arange(lengths.sum()), owner
+
+
+def rescore(records, data):
+    """
+    Re-scores every attempt against its level's stored solution length, in bulk.
+    The path weight is summed from the step weights stored with every attempt, so no level is regenerated
+    and the whole log is scored with a few array operations.
+    Parameters:
+        records, data: As returned by load_attempts().
+    Returns:
+        A dict of per-attempt arrays: "total" (recomputed path weight), "valid" (every step is an edge),
+        "won" (passes the Finish check), "undos" and "clicks".
+    """
+    count = len(records)
+    # The weight of every step of every submitted path; they follow the path in the data file
+    index, attempt = _ragged(records["offset"] + records["events"] + records["path"], records["path"])
+    weights = data[index].astype(np.int64)
+    missing = weights == NO_EDGE
+    total = np.bincount(attempt, weights=np.where(missing, 0, weights), minlength=count).astype(np.int64)
+    valid = np.bincount(attempt, weights=missing, minlength=count) == 0
+    won = valid & (np.abs(total - records["shortest"].astype(np.int64)) <= engine.WIN_TOLERANCE)
+
+    # Undo and click counts from the event streams
+    index, attempt = _ragged(records["offset"], records["events"])
+    undos = np.bincount(attempt, weights=data[index] == UNDO, minlength=count).astype(np.int64)
+    return {"total": total, "valid": valid, "won": won, "undos": undos,
+            "clicks": records["events"].astype(np.int64) - undos}
+
+
+def solve_rates(records, scores):
+    """
+    Summarizes re-scored attempts per level size.
+    Returns:
+        A list of rows (nodes, attempts, solve rate, mean extra weight, mean clicks, mean undos).
+    """
+    rows = []
+    sizes, size_of_attempt = np.unique(records["nodes"], return_inverse=True)
+    size_of_attempt = size_of_attempt.ravel()
+    counts = np.bincount(size_of_attempt, minlength=len(sizes))
+    extra = scores["total"] - records["shortest"].astype(np.int64)
+    sums = {name: np.bincount(size_of_attempt, weights=values, minlength=len(sizes))
+            for name, values in (("won", scores["won"]), ("extra", extra),
+                                 ("clicks", scores["clicks"]), ("undos", scores["undos"]))}
+    for i, nodes in enumerate(sizes.tolist()):
+        n = counts[i]
+        rows.append((nodes, int(n), sums["won"][i] / n, sums["extra"][i] / n,
+                     sums["clicks"][i] / n, sums["undos"][i] / n))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded attempts and report solve rates")
+    parser.add_argument("path", help="the attempt log to analyze")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    records, data = load_attempts(args.path)
+    if len(records) == 0:
+        print(f"{args.path}: no attempts recorded")
+        return
+    scores = rescore(records, data)
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.path}: {len(records)} attempts re-scored in {elapsed:.2f} s")
+    mismatched = int(np.count_nonzero(scores["won"] != records["won"].astype(bool)))
+    invalid = int(np.count_nonzero(~scores["valid"]))
+    if mismatched or invalid:
+        print(f"  {mismatched} attempts scored differently than when played, {invalid} with invalid paths")
+    print(f"{'nodes':>8} {'attempts':>10} {'solved':>8} {'extra':>8} {'clicks':>8} {'undos':>8}")
+    for nodes, count, rate, extra, clicks, undos in solve_rates(records, scores):
+        print(f"{nodes:>8} {count:>10} {rate:>7.1%} {extra:>8.2f} {clicks:>8.2f} {undos:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# Headless multi-session puzzle server for Pathfinder Quest.
+# One asyncio event loop serves many players at once over TCP or a Unix socket. Every connection is an
+# independent session with its own engine.GameState; level generation and the shortest-path setup run in a
+# process pool, so a large level never stalls the other sessions.
+#
+# Protocol: one JSON object per line in both directions. Requests have a "cmd" and may carry an "id",
+# which is echoed back in the response.
+#   {"cmd": "new", "level": 1, "seed": 5, "nodes": 1000, "graph": true}   start a level (all fields optional)
+#   {"cmd": "click", "node": 3}      select a node; returns whether the move was valid and the path weight
+#   {"cmd": "undo"}                  remove the last selected node
+#   {"cmd": "hint"}                  the next node on a shortest path
+#   {"cmd": "finish"}                score the path; a win moves on to the next level, a loss retries the level
+#   {"cmd": "quit"}                  close the session
+#
+# Usage:
+#   python server.py --port 8765
+#   python server.py --unix /tmp/pathfinder.sock --workers 8
+#   python server.py --record attempts.log
+import argparse  # Library for reading command-line options
+import asyncio  # Event loop serving all sessions
+import json  # Wire format
+from concurrent.futures import ProcessPoolExecutor  # Workers for CPU-heavy level setup
+
+import numpy as np  # Library for fast array operations
+
+import engine  # Level generation, path validation and scoring
+from recording import AttemptLog, UNDO  # Optional log of every finished attempt
+
+MAX_LINE = 2 ** 20  # Longest request line accepted, in bytes
+MAX_NODES = 100000  # Largest level a client can ask for
+MAX_LEVEL = 2 ** 31 - 1  # Largest level number a client can ask for
+MAX_SEED = 2 ** 64 - 1  # Largest level seed (seeds are stored as 64-bit integers in the attempt log)
+
+
+def is_int(value):
+    """Returns True for JSON integers. bool is a subclass of int in Python, but true and false are not numbers."""
+    return type(value) is int
+
+
+class EncodedJSON(str):
+    """JSON text that is already encoded and is copied into a response as it is."""
+
+
+def encode(value):
+    """
+    Encodes a response as JSON text. Values that are EncodedJSON are inserted without encoding them again,
+    so large parts of a response can be encoded in a worker process instead of on the event loop.
+    """
+    if isinstance(value, EncodedJSON):
+        return value
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{json.dumps(str(key))}: {encode(item)}" for key, item in value.items()) + "}"
+    return json.dumps(value)
+
+
+def level_info(state, level, include_graph):
+    """
+    Returns the description of a level sent to the client.
+    The edge and weight lists are encoded here already, since this runs in the worker process.
+    Parameters:
+        state: The GameState of the level.
+        level: The level number.
+        include_graph: Whether to include the edge and weight lists.
+    """
+    info = {
+        "level": level,
+        "seed": state.seed,
+        "nodes": state.graph.number_of_nodes(),
+        "start": state.start_node,
+        "end": state.end_node,
+    }
+    if include_graph:
+        edges = np.column_stack([state.graph.edge_u, state.graph.edge_v])
+        info["edges"] = EncodedJSON(json.dumps(edges.tolist()))
+        info["weights"] = EncodedJSON(json.dumps(state.graph.weights.tolist()))
+    return info
+
+
+def prepare_level(level, seed=None, nodes_count=None, include_graph=True):
+    """
+    Generates a level and sets up a GameState for it, including the reverse shortest-path tree,
+    and builds the level description for the client. Runs in a worker process, so even the largest
+    levels never hold up the event loop.
+    Returns:
+        A tuple (ready-to-play engine.GameState, level_info() of the level).
+    """
+    state = engine.GameState()
+    state.setup_level(level, generated=engine.generate_level(level, seed, nodes_count))
+    return state, level_info(state, level, include_graph)
+
+
+class Session:
+    """
+    One player's game on the server: the GameState of the current level, the level number and the score.
+    Commands mirror the buttons of the pygame front-end.
+    """
+
+    def __init__(self, executor, attempt_log=None):
+        self.executor = executor
+        self.attempt_log = attempt_log  # Shared AttemptLog, or None when not recording
+        self.events = []  # Clicks and undos of the current attempt
+        self.state = None
+        self.level = 1
+        self.score = 0
+        self.nodes_count = None  # Level size requested by the client, if any
+        self.include_graph = True
+
+    async def _load_level(self, seed=None):
+        """Prepares the session's current level in the process pool."""
+        loop = asyncio.get_running_loop()
+        self.state, info = await loop.run_in_executor(self.executor, prepare_level, self.level, seed,
+                                                      self.nodes_count, self.include_graph)
+        self.events = []
+        return info
+
+    async def handle(self, request):
+        """
+        Runs one request and returns the response dict.
+        Raises:
+            ValueError: If the request is malformed or not valid in the current state.
+        """
+        cmd = request.get("cmd")
+        if cmd == "new":
+            # Check every field before changing the session, so a bad request leaves it as it was
+            level = request.get("level", self.level)
+            if not is_int(level) or not 1 <= level <= MAX_LEVEL:
+                raise ValueError(f"'level' must be between 1 and {MAX_LEVEL}")
+            seed = request.get("seed")
+            if seed is not None and (not is_int(seed) or not 0 <= seed <= MAX_SEED):
+                raise ValueError(f"'seed' must be between 0 and {MAX_SEED}")
+            nodes_count = request.get("nodes", self.nodes_count)
+            if nodes_count is not None and (not is_int(nodes_count) or not 2 <= nodes_count <= MAX_NODES):
+                raise ValueError(f"'nodes' must be between 2 and {MAX_NODES}")
+            self.level = level
+            self.nodes_count = nodes_count
+            self.include_graph = bool(request.get("graph", self.include_graph))
+            return await self._load_level(seed)
+        if self.state is None:
+            raise ValueError("no level started; send a 'new' command first")
+        if cmd == "click":
+            node = request.get("node")
+            if not is_int(node) or not 0 <= node < self.state.graph.number_of_nodes():
+                raise ValueError("'click' needs a valid 'node'")
+            self.events.append(node)  # Only clicks on real nodes reach the attempt log
+            valid = self.state.handle_click_on_node(node)
+            return {"valid": valid, "total": self.state.total_path_weight, "deviation": self.state.path_deviation()}
+        if cmd == "undo":
+            self.events.append(UNDO)
+            removed = self.state.undo_last_selection()
+            return {"removed": list(removed) if removed else None, "total": self.state.total_path_weight}
+        if cmd == "hint":
+            return {"node": self.state.hint()}
+        if cmd == "finish":
+            # Same scoring as the Finish button in game.main()
+            won = self.state.is_winning_path()
+            if self.attempt_log:
+                self.attempt_log.record(self.level, self.state, self.events, won)
+            self.events = []
+            response = {"won": won, "total": self.state.total_path_weight,
+                        "shortest": self.state.shortest_path_length}
+            if won:
+                self.score += engine.WIN_POINTS  # Award points for a correct path
+                self.level += 1  # Move to the next level
+                response["next"] = await self._load_level()
+            else:
+                self.state.setup_level(self.level, reset_graph=False)  # Retry the current level
+            response["score"] = self.score
+            return response
+        raise ValueError(f"unknown command {cmd!r}")
+
+
+async def serve_connection(reader, writer, executor, attempt_log=None):
+    """Runs one session until the client quits or disconnects."""
+    session = Session(executor, attempt_log)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break  # Client disconnected
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                if request.get("cmd") == "quit":
+                    break
+                response = await session.handle(request)
+                response["ok"] = True
+            except (ValueError, TypeError) as error:  # json.JSONDecodeError is a ValueError
+                response = {"ok": False, "error": str(error)}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+            writer.write(encode(response).encode() + b"\n")
+            await writer.drain()
+    except (ConnectionError, ValueError):
+        pass  # Broken connection or a request line longer than MAX_LINE: drop the session
+    finally:
+        writer.close()
+
+
+async def run_server(host="127.0.0.1", port=8765, unix_path=None, workers=None, record_path=None):
+    """
+    Serves sessions until cancelled.
+    Parameters:
+        host, port: TCP address to listen on (ignored when unix_path is given).
+        unix_path: Optional Unix socket path to listen on instead of TCP.
+        workers: Number of processes for level setup (defaults to the number of CPUs).
+        record_path: Optional attempt log (see recording.py) that every finished attempt is appended to.
+    """
+    attempt_log = AttemptLog(record_path) if record_path else None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        handler = lambda reader, writer: serve_connection(reader, writer, executor, attempt_log)
+        if unix_path:
+            server = await asyncio.start_unix_server(handler, unix_path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(handler, host, port, limit=MAX_LINE)
+        print("Serving on", ", ".join(str(sock.getsockname()) for sock in server.sockets), flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if attempt_log:
+                attempt_log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Pathfinder Quest games to many players at once")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on (default: 8765)")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="level generation processes (default: CPUs)")
+    parser.add_argument("--record", default=None, help="append every finished attempt to this log (see recording.py)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_server(args.host, args.port, args.unix, args.workers, args.record))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# Shortest-path solver engines for Pathfinder Quest.
+# Every engine runs over the same CompactGraph and has the signature
+# engine(graph, source, target, positions=None) -> (path, length), so they can be swapped freely.
+import heapq  # Priority queue used by all engines
+import math  # Square roots for the A* heuristic
+import weakref  # Per-graph cache of the A* heuristic that does not keep graphs alive
+
+import numpy as np  # Library for fast array operations
+
+_heuristics = weakref.WeakKeyDictionary()  # graph -> (positions, weights version, scale, points)
+
+
+def shortest_path_tree(graph, root):
+    """
+    Runs Dijkstra's algorithm from `root` over the whole graph.
+    Since the graph is undirected, this gives the shortest distance from every node to `root`
+    and the next node to move to on the way there.
+    Parameters:
+        graph: The CompactGraph to search.
+        root: The node every path leads to.
+    Returns:
+        A tuple (distance, next_hop) of NumPy arrays. Unreachable nodes have distance -1;
+        next_hop is -1 at the root and at unreachable nodes.
+    """
+    indptr, neighbors, weights = graph.flat_adjacency()
+    distance = [-1] * graph.number_of_nodes()  # -1 means not reached yet
+    hop = [-1] * graph.number_of_nodes()
+    distance[root] = 0
+    queue = [(0, root)]
+    while queue:
+        dist, node = heapq.heappop(queue)
+        if dist > distance[node]:
+            continue  # Stale queue entry, a shorter route was already found
+        for slot in range(indptr[node], indptr[node + 1]):
+            neighbor = neighbors[slot]
+            new_dist = dist + weights[slot]
+            if distance[neighbor] < 0 or new_dist < distance[neighbor]:
+                distance[neighbor] = new_dist
+                hop[neighbor] = node  # From the neighbor, move towards the root through this node
+                heapq.heappush(queue, (new_dist, neighbor))
+    return np.array(distance, dtype=np.int64), np.array(hop, dtype=np.int32)
+
+
+def repair_shortest_path_tree(graph, distance, next_hop, u, v, old_weight):
+    """
+    Updates a tree from shortest_path_tree() in place after the weight of the edge between u and v changed,
+    visiting only the nodes whose distance can change (dynamic SSSP, as in Ramalingam and Reps):
+    - a cheaper edge can only shorten paths through it, so a Dijkstra search starts at its end points and
+      stops where distances no longer improve;
+    - a more expensive edge only matters if the tree uses it; then only the subtree hanging below it loses
+      its distances, and those nodes are reattached through their best neighbor outside the subtree.
+    Parameters:
+        graph: The CompactGraph, already holding the new weight.
+        distance, next_hop: The arrays returned by shortest_path_tree(), modified in place.
+        u, v: The end nodes of the changed edge.
+        old_weight: The weight of the edge before the change.
+    Returns:
+        A list of the nodes whose distance or next hop was changed.
+    """
+    def adjacent(node):
+        # (neighbor, weight) pairs of one node; the repair only touches a few nodes, so it reads single rows
+        # instead of building lists for the whole graph
+        return zip(*graph.row(node))
+
+    weight = graph.weight(u, v)
+    queue = []
+    if weight < old_weight:
+        affected = None  # Any node can improve
+        for node, via in ((u, v), (v, u)):
+            if distance[via] >= 0 and (distance[node] < 0 or distance[via] + weight < distance[node]):
+                distance[node] = distance[via] + weight
+                next_hop[node] = via
+                heapq.heappush(queue, (int(distance[node]), node))
+    elif weight > old_weight:
+        if next_hop[u] == v:
+            child = u
+        elif next_hop[v] == u:
+            child = v
+        else:
+            return []  # The tree does not use the edge, so no distance changes
+        # Collect the subtree below the edge: every node whose path to the root runs through `child`
+        affected = {child}
+        stack = [child]
+        while stack:
+            node = stack.pop()
+            for neighbor, _ in adjacent(node):
+                if next_hop[neighbor] == node and neighbor not in affected:
+                    affected.add(neighbor)
+                    stack.append(neighbor)
+        # Reattach every node of the subtree through its best neighbor outside of it
+        for node in affected:
+            best, best_hop = -1, -1
+            for neighbor, edge_weight in adjacent(node):
+                if neighbor not in affected and distance[neighbor] >= 0:
+                    candidate = int(distance[neighbor]) + edge_weight
+                    if best < 0 or candidate < best:
+                        best, best_hop = candidate, neighbor
+            distance[node], next_hop[node] = best, best_hop
+            if best >= 0:
+                heapq.heappush(queue, (best, node))
+    else:
+        return []
+
+    # Dijkstra from the repaired nodes; with an increase it never leaves the subtree
+    changed = set(affected or ())
+    while queue:
+        dist, node = heapq.heappop(queue)
+        if dist > distance[node]:
+            continue  # Stale queue entry, a shorter route was already found
+        changed.add(node)
+        for neighbor, edge_weight in adjacent(node):
+            if affected is not None and neighbor not in affected:
+                continue
+            new_dist = dist + edge_weight
+            if distance[neighbor] < 0 or new_dist < distance[neighbor]:
+                distance[neighbor] = new_dist
+                next_hop[neighbor] = node
+                heapq.heappush(queue, (new_dist, neighbor))
+    return sorted(changed)
+
+
+def dijkstra_path(graph, source, target, positions=None):
+    """
+    Finds the shortest path between two nodes with Dijkstra's algorithm.
+    Parameters:
+        graph: The CompactGraph to search.
+        source: The node the path starts at.
+        target: The node the path ends at.
+        positions: Unused; accepted so every engine has the same signature.
+    Returns:
+        A tuple (path, length) with the list of nodes on the path and its total weight.
+    Raises:
+        ValueError: If the target cannot be reached from the source.
+    """
+    distance = {source: 0}  # Best known distance to every reached node
+    previous = {}  # The node each reached node was reached from
+    queue = [(0, source)]
+    while queue:
+        dist, node = heapq.heappop(queue)
+        if node == target:
+            break
+        if dist > distance[node]:
+            continue  # Stale queue entry, a shorter route was already found
+        for neighbor, weight in zip(*graph.row(node)):  # Only the rows of visited nodes are read
+            new_dist = dist + weight
+            if new_dist < distance.get(neighbor, new_dist + 1):
+                distance[neighbor] = new_dist
+                previous[neighbor] = node
+                heapq.heappush(queue, (new_dist, neighbor))
+    if target not in distance:
+        raise ValueError(f"node {target} is not reachable from node {source}")
+
+    # Walk back from the target to rebuild the path
+    path = [target]
+    while path[-1] != source:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path, distance[target]
+
+
+def bidirectional_dijkstra_path(graph, source, target, positions=None):
+    """
+    Finds the shortest path by running Dijkstra's algorithm from both ends at once and
+    stopping when the two searches meet, which usually settles far fewer nodes than a one-sided search.
+    Parameters:
+        graph: The CompactGraph to search.
+        source: The node the path starts at.
+        target: The node the path ends at.
+        positions: Unused; accepted so every engine has the same signature.
+    Returns:
+        A tuple (path, length) with the list of nodes on the path and its total weight.
+    Raises:
+        ValueError: If the target cannot be reached from the source.
+    """
+    if source == target:
+        return [source], 0
+    distance = ({source: 0}, {target: 0})  # Best known distances from the source and from the target
+    previous = ({}, {})  # The node each reached node was reached from, per direction
+    settled = (set(), set())
+    queues = ([(0, source)], [(0, target)])
+    best, meeting = None, None  # Length of the best path found so far and the node where it meets
+    while queues[0] and queues[1]:
+        # The searches can stop once no unsettled node can lead to a shorter path
+        if best is not None and queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1  # Expand the direction that is behind
+        dist, node = heapq.heappop(queues[side])
+        if node in settled[side]:
+            continue  # Stale queue entry
+        settled[side].add(node)
+        for neighbor, weight in zip(*graph.row(node)):  # Only the rows of visited nodes are read
+            new_dist = dist + weight
+            if new_dist < distance[side].get(neighbor, new_dist + 1):
+                distance[side][neighbor] = new_dist
+                previous[side][neighbor] = node
+                heapq.heappush(queues[side], (new_dist, neighbor))
+            # Any node reached by both searches joins them into a full path
+            other = distance[1 - side].get(neighbor)
+            if other is not None and (best is None or distance[side][neighbor] + other < best):
+                best, meeting = distance[side][neighbor] + other, neighbor
+    if best is None:
+        raise ValueError(f"node {target} is not reachable from node {source}")
+
+    # Rebuild both halves of the path from the meeting node
+    path = [meeting]
+    while path[-1] != source:
+        path.append(previous[0][path[-1]])
+    path.reverse()
+    while path[-1] != target:
+        path.append(previous[1][path[-1]])
+    return path, best
+
+
+def heuristic_scale(graph, positions):
+    """
+    Returns the largest factor k such that k times the straight-line distance between the two ends of
+    every edge is at most its weight. k times the straight-line distance to the target then never
+    overestimates the remaining path weight, so A* with that heuristic stays exact.
+    Parameters:
+        graph: The CompactGraph.
+        positions: (n, 2) array with the position of every node.
+    """
+    positions = np.asarray(positions, dtype=float)
+    lengths = np.hypot(*(positions[graph.edge_u] - positions[graph.edge_v]).T)
+    if len(lengths) == 0 or np.any(lengths == 0):
+        return 0.0  # Overlapping nodes: no useful heuristic, A* falls back to Dijkstra
+    return float(np.min(graph.weights / lengths))
+
+
+def astar_heuristic(graph, positions):
+    """
+    Returns (scale, points) for A*: the heuristic_scale() of the layout and the positions as Python lists.
+    Both need a pass over the whole graph, so they are computed once per graph and layout and reused
+    until the layout object or a weight (see CompactGraph.version) changes. Positions must not be modified
+    in place.
+    """
+    cached = _heuristics.get(graph)
+    if cached is not None and cached[0] is positions and cached[1] == graph.version:
+        return cached[2], cached[3]
+    scale = heuristic_scale(graph, positions)
+    points = np.asarray(positions, dtype=float).tolist()
+    _heuristics[graph] = (positions, graph.version, scale, points)
+    return scale, points
+
+
+def astar_path(graph, source, target, positions=None):
+    """
+    Finds the shortest path with A*, guided by the straight-line distance between node positions.
+    The distance is scaled by heuristic_scale() so the heuristic never overestimates and the result is exact.
+    Parameters:
+        graph: The CompactGraph to search.
+        source: The node the path starts at.
+        target: The node the path ends at.
+        positions: (n, 2) array with the layout position of every node (required).
+    Returns:
+        A tuple (path, length) with the list of nodes on the path and its total weight.
+    Raises:
+        ValueError: If no positions are given or the target cannot be reached from the source.
+    """
+    if positions is None:
+        raise ValueError("A* needs node positions for its heuristic")
+    scale, points = astar_heuristic(graph, positions)
+    target_x, target_y = points[target]
+
+    def estimate(node):
+        x, y = points[node]
+        return scale * math.hypot(x - target_x, y - target_y)
+
+    distance = {source: 0}  # Best known distance to every reached node
+    previous = {}  # The node each reached node was reached from
+    queue = [(estimate(source), 0, source)]
+    while queue:
+        _, dist, node = heapq.heappop(queue)
+        if node == target:
+            break
+        if dist > distance[node]:
+            continue  # Stale queue entry, a shorter route was already found
+        for neighbor, weight in zip(*graph.row(node)):  # Only the rows of visited nodes are read
+            new_dist = dist + weight
+            if new_dist < distance.get(neighbor, new_dist + 1):
+                distance[neighbor] = new_dist
+                previous[neighbor] = node
+                heapq.heappush(queue, (new_dist + estimate(neighbor), new_dist, neighbor))
+    if target not in distance:
+        raise ValueError(f"node {target} is not reachable from node {source}")
+
+    # Walk back from the target to rebuild the path
+    path = [target]
+    while path[-1] != source:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path, distance[target]
+
+
+# Solver engines by name
+SOLVERS = {
+    "dijkstra": dijkstra_path,
+    "bidirectional": bidirectional_dijkstra_path,
+    "astar": astar_path,
+}
+
+
+def solve(graph, source, target, engine="dijkstra", positions=None):
+    """
+    Finds the shortest path with the named solver engine.
+    Parameters:
+        graph: The CompactGraph to search.
+        source: The node the path starts at.
+        target: The node the path ends at.
+        engine: The name of the engine, one of SOLVERS.
+        positions: Node positions, needed by the "astar" engine.
+    Returns:
+        A tuple (path, length) with the list of nodes on the path and its total weight.
+    """
+    if engine not in SOLVERS:
+        raise ValueError(f"unknown solver engine {engine!r}, expected one of {sorted(SOLVERS)}")
+    return SOLVERS[engine](graph, source, target, positions)
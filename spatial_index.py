@@ -0,0 +1,88 @@
+# Uniform grid spatial index over node positions.
+# Built once per layout; answers "which node is under the mouse" and "which nodes are inside this
+# rectangle" by looking only at the grid cells around the query instead of scanning every node.
+import math  # Floor and square root for grid arithmetic
+
+import numpy as np  # Library for fast array operations
+
+
+class GridIndex:
+    """
+    Buckets nodes into square grid cells so point and rectangle queries only touch nearby nodes.
+    Node ids are the row numbers of the positions array.
+    """
+
+    def __init__(self, positions, cell_size):
+        """
+        Parameters:
+            positions: Sequence or (n, 2) array with the (x, y) position of every node.
+            cell_size: Width and height of a grid cell. Queries visit every cell they overlap, so a small multiple
+                of the typical distance between nodes, which keeps a few nodes per cell, works well.
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.cell_size = float(cell_size)
+        self._points = self.positions.tolist()  # Plain floats, faster than NumPy scalars in small loops
+        self._cells = {}  # (cell x, cell y) -> list of nodes in that cell
+        cells = np.floor(self.positions / self.cell_size).astype(np.int64).tolist()
+        for node, cell in enumerate(cells):
+            self._cells.setdefault(tuple(cell), []).append(node)
+
+    def _cell_of(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def query_radius(self, point, radius):
+        """
+        Returns every node strictly closer than `radius` to the point.
+        Parameters:
+            point: The (x, y) query position.
+            radius: The search radius.
+        Returns:
+            A list of (squared distance, node) pairs, closest first.
+        """
+        x, y = point
+        left, top = self._cell_of(x - radius, y - radius)
+        right, bottom = self._cell_of(x + radius, y + radius)
+        found = []
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                for node in self._cells.get((cx, cy), ()):
+                    px, py = self._points[node]
+                    dist2 = (px - x) ** 2 + (py - y) ** 2
+                    if dist2 < radius ** 2:
+                        found.append((dist2, node))
+        found.sort()
+        return found
+
+    def nearest(self, point, radius):
+        """
+        Returns the node closest to the point if it is strictly within `radius`, otherwise None.
+        With the node radius as `radius` this is a point-in-node test.
+        """
+        found = self.query_radius(point, radius)
+        return found[0][1] if found else None
+
+    def query_rect(self, left, top, right, bottom):
+        """
+        Returns the nodes whose position lies inside the rectangle (edges included).
+        Parameters:
+            left, top, right, bottom: The rectangle bounds.
+        Returns:
+            An int64 array of node ids in ascending order.
+        """
+        cell_left, cell_top = self._cell_of(left, top)
+        cell_right, cell_bottom = self._cell_of(right, bottom)
+        if (cell_right - cell_left + 1) * (cell_bottom - cell_top + 1) <= len(self._cells):
+            # Small rectangle: visit the cells it covers
+            buckets = [self._cells.get((cx, cy), ())
+                       for cx in range(cell_left, cell_right + 1)
+                       for cy in range(cell_top, cell_bottom + 1)]
+        else:
+            # Large rectangle: cheaper to walk the occupied cells than every covered cell
+            buckets = [nodes for (cx, cy), nodes in self._cells.items()
+                       if cell_left <= cx <= cell_right and cell_top <= cy <= cell_bottom]
+        candidates = np.fromiter((node for nodes in buckets for node in nodes), dtype=np.int64)
+        if len(candidates) == 0:
+            return candidates
+        xy = self.positions[candidates]
+        inside = (xy[:, 0] >= left) & (xy[:, 0] <= right) & (xy[:, 1] >= top) & (xy[:, 1] <= bottom)
+        return np.sort(candidates[inside])
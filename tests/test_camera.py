@@ -0,0 +1,45 @@
+import numpy as np
+
+import layout
+from camera import Camera
+from compact_graph import CompactGraph
+from spatial_index import GridIndex
+
+
+def test_round_trip_between_world_and_screen():
+    camera = Camera()
+    camera.zoom_at((400, 300), 2.5)
+    camera.pan(-30, 12)
+    world = np.array([[10.25, 20.5], [400.0, 300.0], [799.9, 0.1]])
+    screen = camera.to_screen(world)
+    assert screen.dtype.kind == "i"
+    for (x, y), point in zip(world, screen):
+        back = camera.to_world(point)
+        assert abs(back[0] - x) <= 0.5 / camera.zoom and abs(back[1] - y) <= 0.5 / camera.zoom
+
+
+def test_zoom_is_clamped_and_keeps_the_anchor():
+    camera = Camera(min_zoom=0.5, max_zoom=4.0)
+    anchor = camera.to_world((100, 200))
+    assert camera.zoom_at((100, 200), 10)
+    assert camera.zoom == 4.0
+    assert np.allclose(camera.to_world((100, 200)), anchor)
+    assert not camera.zoom_at((100, 200), 2)
+
+
+def test_zoom_separates_nodes_closer_than_a_pixel():
+    # A dense layout puts many nodes less than a pixel apart; they must still be told apart when zoomed in
+    graph = CompactGraph(2000, np.arange(1999), np.arange(1, 2000), np.ones(1999))
+    positions = layout.grid_layout(graph.number_of_nodes(), 40, 40, padding=10)
+    assert len(np.unique(np.rint(positions), axis=0)) < len(positions)
+
+    camera = Camera(max_zoom=64)
+    camera.zoom_at((0, 0), 64)
+    screen = camera.to_screen(positions)
+    assert len(np.unique(screen, axis=0)) == len(positions)
+
+    # A click on a node's screen position finds that node
+    index = GridIndex(positions, 1.0)
+    for node in (0, 777, 1999):
+        world = camera.to_world(screen[node])
+        assert index.nearest(world, 0.2) == node
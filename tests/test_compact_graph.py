@@ -0,0 +1,61 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import engine
+from compact_graph import CompactGraph
+
+
+def test_edge_lookup_matches_networkx():
+    rng = random.Random(1)
+    graph = engine.generate_level_graph(0, seed=1, nodes_count=200, extra_edges=400)
+    reference = graph.to_networkx()
+    pairs = [tuple(rng.sample(range(200), 2)) for _ in range(2000)] + list(reference.edges)
+    for u, v in pairs:
+        assert graph.has_edge(u, v) == graph.has_edge(v, u) == reference.has_edge(u, v)
+        if reference.has_edge(u, v):
+            edge = graph.edge_id(u, v)
+            assert edge == graph.edge_id(v, u)
+            assert {int(graph.edge_u[edge]), int(graph.edge_v[edge])} == {u, v}
+            assert graph.weight(u, v) == reference[u][v]["weight"]
+        else:
+            assert graph.edge_id(u, v) == -1
+    us, vs = zip(*pairs)
+    assert graph.edge_ids(us, vs).tolist() == [graph.edge_id(u, v) for u, v in pairs]
+
+
+def test_rows_follow_weight_changes():
+    graph = CompactGraph(4, [0, 0, 1, 2], [1, 2, 2, 3], [5, 6, 7, 8])
+    assert graph.row(2) == ([0, 1, 3], [6, 7, 8])
+    assert graph.set_weight(2, 1, 9) == 7
+    assert graph.weight(1, 2) == 9
+    assert graph.row(1) == ([0, 2], [5, 9])
+    assert graph.row(2) == ([0, 1, 3], [6, 9, 8])
+    assert graph.neighbor_weights(2).tolist() == [6, 9, 8]
+    indptr, neighbors, weights = graph.flat_adjacency()
+    assert neighbors[indptr[2]:indptr[3]] == [0, 1, 3] and weights[indptr[2]:indptr[3]] == [6, 9, 8]
+
+    copy = graph.copy()
+    copy.set_weight(0, 1, 1)
+    assert graph.weight(0, 1) == 5 and copy.weight(0, 1) == 1
+
+
+def test_round_trip_through_networkx():
+    graph = engine.generate_level_graph(0, seed=2, nodes_count=50, extra_edges=60)
+    back = CompactGraph.from_networkx(graph.to_networkx())
+    assert nx.utils.graphs_equal(back.to_networkx(), graph.to_networkx())
+    assert sorted(back.edges) == sorted(graph.edges)
+
+
+def test_rejects_bad_edges():
+    with pytest.raises(ValueError):
+        CompactGraph(3, [0, 1], [1, 0], [1, 1])  # The same edge twice
+    with pytest.raises(ValueError):
+        CompactGraph(3, [0], [0], [1])
+    with pytest.raises(ValueError):
+        CompactGraph(3, [0], [3], [1])
+    with pytest.raises(KeyError):
+        CompactGraph(3, [0], [1], [1]).set_weight(1, 2, 5)
+    assert CompactGraph(3, np.array([], dtype=int), [], []).edge_id(0, 1) == -1
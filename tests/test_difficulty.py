@@ -0,0 +1,44 @@
+import networkx as nx
+import pytest
+
+import engine
+from difficulty import generate_graded_level, grade_level, ranked_paths
+from level_pool import LevelPool
+from solvers import shortest_path_tree
+
+
+def all_paths(generated):
+    """(weight, hops) of every simple path of a level, by brute force."""
+    reference = generated.graph.to_networkx()
+    return sorted((nx.path_weight(reference, path, "weight"), len(path) - 1)
+                  for path in nx.all_simple_paths(reference, generated.start_node, generated.end_node))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_ranked_paths_match_brute_force(seed):
+    generated = engine.Level(0, seed, engine.generate_level_graph(0, seed, nodes_count=9, extra_edges=7), 0, 8)
+    distance, _ = shortest_path_tree(generated.graph, generated.end_node)
+    ranked = list(ranked_paths(generated.graph, generated.start_node, generated.end_node, distance))
+    assert [weight for weight, _ in ranked] == sorted(weight for weight, _ in ranked)  # Shortest first
+    assert sorted(ranked) == all_paths(generated)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_grade_matches_brute_force(seed):
+    generated = engine.Level(0, seed, engine.generate_level_graph(0, seed, nodes_count=9, extra_edges=7), 0, 8)
+    paths = all_paths(generated)
+    shortest = paths[0][0]
+    grade = grade_level(generated, k=4)
+    assert grade.shortest == shortest and grade.nodes == 9
+    assert grade.hops == min(hops for weight, hops in paths if weight == shortest)
+    assert grade.near_optimal == sum(weight <= shortest + engine.WIN_TOLERANCE for weight, _ in paths)
+    assert grade.gaps == tuple(weight - shortest for weight, _ in paths[1:4])
+
+
+def test_pool_grades_levels_in_the_band():
+    band = (0.5, 3.0)
+    with LevelPool(base_seed=5, depth=2, nodes_count=15, band=band) as pool:
+        generated = pool.get(2)
+        expected = generate_graded_level(2, engine.level_seed(5, 2), 15, band)
+    assert generated.seed == expected.seed and generated.graph.edges == expected.graph.edges
+    assert band[0] <= grade_level(generated).difficulty <= band[1]
@@ -0,0 +1,130 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import engine
+from compact_graph import CompactGraph
+
+
+def small_level():
+    """0 - 1 - 2 - 3 costs 3; the direct edges 0 - 3 (5) and 1 - 3 (4) are longer."""
+    graph = CompactGraph(4, [0, 1, 2, 0, 1], [1, 2, 3, 3, 3], [1, 1, 1, 5, 4])
+    state = engine.GameState()
+    state.setup_level(1, generated=engine.Level(1, 0, graph, 0, 3))
+    return state
+
+
+def test_shortest_path_and_hints():
+    state = small_level()
+    assert state.shortest_path == [0, 1, 2, 3]
+    assert state.shortest_path_length == 3
+    assert state.is_solution_edge(2, 1) and not state.is_solution_edge(0, 3)
+    assert state.hint() == 1 and state.hint(2) == 3 and state.hint(3) is None
+
+
+def test_clicks_and_undo():
+    state = small_level()
+    assert not state.handle_click_on_node(2)  # Not connected to the start node
+    assert state.selected_path == [] and state.total_path_weight == 0
+    assert state.handle_click_on_node(1)
+    assert state.handle_click_on_node(3)
+    assert state.selected_path == [1, 3] and state.total_path_weight == 5
+    assert state.highlighted_edges == [(0, 1), (1, 3)]
+    assert state.path_deviation() == 2 and not state.is_still_optimal()
+    assert state.undo_last_selection() == (1, 3)
+    assert state.total_path_weight == 1 and state.is_still_optimal()
+    assert state.undo_last_selection() == (0, 1)
+    assert state.undo_last_selection() is None
+
+
+def test_revisited_nodes_and_edges_stay_selected_until_their_last_use():
+    state = small_level()
+    for node in (1, 2, 1, 3):  # Walks the edge 1 - 2 twice and visits node 1 twice
+        assert state.handle_click_on_node(node)
+    assert state.total_path_weight == 1 + 1 + 1 + 4
+    assert state.is_selected(1) and state.is_highlighted(2, 1)
+    state.undo_last_selection()
+    state.undo_last_selection()  # Drops the second visit of 1 and one use of the edge 1 - 2
+    assert state.is_selected(1) and state.is_highlighted(1, 2)
+    state.undo_last_selection()
+    assert not state.is_selected(2) and not state.is_highlighted(1, 2)
+    assert state.is_selected(1) and state.is_highlighted(0, 1)
+    assert not state.is_selected(3) and not state.is_highlighted(1, 3)
+
+
+def test_winning_path_tolerance():
+    state = small_level()
+    for node in (1, 3):  # Weight 5, two more than the shortest path
+        state.handle_click_on_node(node)
+    assert not state.is_winning_path()
+    state.undo_last_selection()
+    for node in (2, 3):
+        state.handle_click_on_node(node)
+    assert state.is_winning_path()
+
+
+def test_snapshot_and_restore():
+    state = small_level()
+    state.handle_click_on_node(1)
+    state.handle_click_on_node(2)
+    saved = state.snapshot()
+    state.handle_click_on_node(1)
+    state.handle_click_on_node(3)
+    state.restore(saved)
+    assert state.selected_path == [1, 2] and state.total_path_weight == 2
+    assert state.highlighted_edges == [(0, 1), (1, 2)]
+    assert not state.is_selected(3) and not state.is_highlighted(1, 3)
+    assert state.handle_click_on_node(3) and state.total_path_weight == 3
+
+    state.restore(())
+    assert state.selected_path == [] and state.total_path_weight == 0 and not state.is_selected(1)
+
+
+def test_restore_uses_the_current_weights():
+    state = small_level()
+    state.handle_click_on_node(1)
+    state.handle_click_on_node(2)
+    saved = state.snapshot()
+    state.update_edge_weights([(1, 2, 8)])  # Live traffic after the snapshot
+    state.undo_last_selection()
+    state.restore(saved)
+    assert state.total_path_weight == 1 + 8
+
+
+def test_retry_keeps_the_graph_and_clears_the_path():
+    state = small_level()
+    graph = state.graph
+    state.handle_click_on_node(1)
+    state.update_edge_weights([(2, 3, 9)])
+    state.setup_level(1, reset_graph=False)
+    assert state.graph is graph and state.graph.weight(2, 3) == 9
+    assert state.selected_path == [] and state.total_path_weight == 0
+    assert state.shortest_path_length == 5  # 0 - 3 and 0 - 1 - 3 now tie
+    assert state.shortest_path[0] == 0 and state.shortest_path[-1] == 3
+
+
+def test_generated_levels_are_reproducible():
+    first, second = engine.generate_level(4, seed=42), engine.generate_level(4, seed=42)
+    assert (first.start_node, first.end_node) == (second.start_node, second.end_node)
+    assert np.array_equal(first.graph.weights, second.graph.weights)
+    assert first.graph.edges == second.graph.edges
+
+
+@pytest.mark.parametrize("nodes_count, extra_edges", [(2, 5), (6, 100), (10, 20), (500, 500), (3000, 9000)])
+def test_generated_graphs_are_connected_and_simple(nodes_count, extra_edges):
+    graph = engine.generate_level_graph(0, seed=nodes_count, nodes_count=nodes_count, extra_edges=extra_edges)
+    max_edges = nodes_count * (nodes_count - 1) // 2
+    assert graph.number_of_nodes() == nodes_count
+    assert graph.number_of_edges() == min(nodes_count - 1 + extra_edges, max_edges)
+    pairs = {(min(u, v), max(u, v)) for u, v in graph.edges}
+    assert len(pairs) == graph.number_of_edges() and all(u != v for u, v in pairs)  # No duplicates or loops
+    assert nx.is_connected(graph.to_networkx())
+    assert graph.weights.min() >= engine.MIN_WEIGHT and graph.weights.max() <= engine.MAX_WEIGHT
+
+
+def test_same_seed_gives_the_same_graph():
+    first = engine.generate_level_graph(0, seed=11, nodes_count=1000)
+    second = engine.generate_level_graph(0, seed=11, nodes_count=1000)
+    other = engine.generate_level_graph(0, seed=12, nodes_count=1000)
+    assert first.edges == second.edges and np.array_equal(first.weights, second.weights)
+    assert first.edges != other.edges
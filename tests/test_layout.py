@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import engine
+import layout
+from level_pool import LevelPool
+
+
+@pytest.mark.parametrize("points", [np.random.default_rng(0).normal(size=(500, 2)) * [30, 2],
+                                    [[5, 5], [5, 9], [5, 13]], [[1, 1]]])
+def test_fit_to_screen_fills_the_padded_screen(points):
+    fitted = layout.fit_to_screen(points, 800, 600, padding=100)
+    assert fitted.shape == (len(points), 2) and fitted.dtype == float
+    assert (fitted >= [100 - 1e-6, 100 - 1e-6]).all() and (fitted <= [700 + 1e-6, 500 + 1e-6]).all()
+    assert np.allclose((fitted.min(axis=0) + fitted.max(axis=0)) / 2, [400, 300])  # Centered
+    if len(points) > 1:  # Touches the padding on at least one axis
+        span = np.ptp(fitted, axis=0)
+        assert np.isclose(span[0], 600) or np.isclose(span[1], 400)
+
+
+@pytest.mark.parametrize("kind", sorted(layout.LAYOUTS))
+def test_layouts_stay_on_the_screen(kind):
+    graph = engine.generate_level_graph(0, seed=3, nodes_count=300)
+    positions = layout.compute_layout(graph, 800, 600, kind, padding=50, seed=3)
+    assert positions.shape == (300, 2)
+    assert (positions >= 50 - 1e-6).all() and (positions <= [750 + 1e-6, 550 + 1e-6]).all()
+
+
+def test_cache_hits_and_evictions(monkeypatch):
+    monkeypatch.setattr(layout, "_layout_cache", type(layout._layout_cache)())
+    monkeypatch.setattr(layout, "CACHE_SIZE", 2)
+    graphs = {seed: engine.generate_level_graph(0, seed=seed, nodes_count=30) for seed in (1, 2, 3)}
+    first = layout.cached_layout(graphs[1], 1, 800, 600)
+    assert layout.cached_layout(graphs[1], 1, 800, 600) is first  # Hit
+    assert layout.cached_layout(graphs[1], 1, 1024, 768) is not first  # Another screen size is another layout
+    assert layout.cached_layout(graphs[1], 1, 800, 600) is first
+    second = layout.cached_layout(graphs[2], 2, 800, 600)  # Evicts the least recently used (1024 x 768)
+    assert layout.cached_layout(graphs[1], 1, 800, 600) is first
+    layout.cached_layout(graphs[3], 3, 800, 600)  # Evicts seed 2, used less recently than seed 1
+    assert layout.cached_layout(graphs[1], 1, 800, 600) is first
+    again = layout.cached_layout(graphs[2], 2, 800, 600)
+    assert again is not second and np.array_equal(again, second)  # Recomputed, to the same positions
+    assert len(layout._layout_cache) == 2
+    assert layout.cached_layout(graphs[3], None, 800, 600) is not layout.cached_layout(graphs[3], None, 800, 600)
+
+
+def test_pool_lays_levels_out_in_the_background():
+    with LevelPool(base_seed=4, nodes_count=40, layout_kind="force", width=640, height=480) as pool:
+        generated = pool.get(1)
+    expected = layout.compute_layout(generated.graph, 640, 480, "force", seed=generated.seed)
+    assert np.array_equal(generated.positions, expected)
+    with LevelPool(base_seed=4, nodes_count=40) as pool:
+        assert pool.get(1).positions is None
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import engine
+import layout
+from level_pack import LevelPack, build_pack, write_pack
+from solvers import shortest_path_tree
+
+
+def test_write_and_read_round_trip(tmp_path):
+    levels = [engine.generate_level(number, seed=100 + number) for number in range(1, 6)]
+    path = tmp_path / "levels.pfq"
+    # A generator: write_pack must not need the levels up front
+    assert write_pack(path, (level for level in levels), 640, 480, "circular") == len(levels)
+
+    with LevelPack(path) as pack:
+        assert len(pack) == len(levels)
+        assert (pack.width, pack.height) == (640, 480)
+        for i, level in enumerate(levels):
+            loaded = pack[i]
+            assert (loaded.level, loaded.seed) == (level.level, level.seed)
+            assert (loaded.start_node, loaded.end_node) == (level.start_node, level.end_node)
+            assert loaded.graph.number_of_nodes() == level.graph.number_of_nodes()
+            assert loaded.graph.edge_u.tolist() == level.graph.edge_u.tolist()
+            assert loaded.graph.edge_v.tolist() == level.graph.edge_v.tolist()
+            assert loaded.graph.weights.tolist() == level.graph.weights.tolist()
+            # Positions are stored as floats, not rounded to pixels
+            expected = layout.compute_layout(level.graph, 640, 480, "circular")
+            assert loaded.positions.shape == expected.shape
+            assert np.allclose(loaded.positions, expected, atol=1e-3)
+
+            solution, length = pack.solution(i)
+            distance, _ = shortest_path_tree(level.graph, level.end_node)
+            assert length == distance[level.start_node]
+            assert solution[0] == level.start_node and solution[-1] == level.end_node
+            assert length == sum(level.graph.weight(a, b) for a, b in zip(solution, solution[1:]))
+        assert pack.index["length"].tolist() == [pack.solution(i)[1] for i in range(len(levels))]
+
+
+def test_build_pack_reproduces_the_level_seeds(tmp_path):
+    path = tmp_path / "levels.pfq"
+    seed = build_pack(path, 3, base_seed=7, first_level=2, layout_kind="grid")
+    assert seed == 7
+    with LevelPack(path) as pack:
+        for i in range(3):
+            expected = engine.generate_level(2 + i, engine.level_seed(7, 2 + i))
+            assert pack[i].seed == expected.seed
+            assert pack[i].graph.weights.tolist() == expected.graph.weights.tolist()
+        # get() cycles through the pack like a LevelPool hands out levels
+        assert pack.get(4).seed == pack[0].seed
+
+
+def test_empty_pack(tmp_path):
+    path = tmp_path / "empty.pfq"
+    assert write_pack(path, []) == 0
+    with LevelPack(path) as pack:
+        assert len(pack) == 0
+        with pytest.raises(ValueError):
+            pack.get(1)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(np.arange(64, dtype=np.int32).tobytes())
+    with pytest.raises(ValueError):
+        LevelPack(path)
@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+from recording import RECORD, UNDO, AttemptLog, load_attempts, rescore
+
+
+def play(state, rng, traffic_rng=None):
+    """Plays a random attempt and returns its events."""
+    events = []
+    for _ in range(rng.integers(0, 12)):
+        if rng.random() < 0.2:
+            state.undo_last_selection()
+            events.append(UNDO)
+            continue
+        node = state.hint() if rng.random() < 0.6 else int(rng.integers(state.graph.number_of_nodes()))
+        if node is None:
+            break
+        events.append(node)
+        state.handle_click_on_node(node)
+        if traffic_rng is not None:
+            state.update_edge_weights(engine.traffic_changes(state.graph, traffic_rng))
+    return events
+
+
+def test_rescore_matches_the_game(tmp_path):
+    path = str(tmp_path / "attempts.log")
+    rng = np.random.default_rng(1)
+    traffic_rng = np.random.default_rng(2)
+    expected = []
+    with AttemptLog(path) as log:
+        for attempt in range(300):
+            level = int(rng.integers(1, 6))
+            state = engine.GameState()
+            state.setup_level(level, seed=int(rng.integers(2 ** 32)))
+            # Every other attempt is played with live traffic
+            events = play(state, rng, traffic_rng if attempt % 2 else None)
+            won = state.is_winning_path()
+            log.record(level, state, events, won)
+            expected.append((won, state.total_path_weight, events.count(UNDO), len(events)))
+
+    records, data = load_attempts(path)
+    scores = rescore(records, data)
+    won, total, undos, events = (np.array(column) for column in zip(*expected))
+    assert scores["valid"].all()
+    assert scores["won"].tolist() == won.tolist() == records["won"].astype(bool).tolist()
+    assert scores["total"].tolist() == total.tolist()
+    assert scores["undos"].tolist() == undos.tolist()
+    assert scores["clicks"].tolist() == (events - undos).tolist()
+
+
+def test_partly_written_record_is_cut_off(tmp_path):
+    path = str(tmp_path / "attempts.log")
+    state = engine.GameState()
+    state.setup_level(2, seed=5)
+    with AttemptLog(path) as log:
+        log.record(2, state, [], False)
+    # A crash in the middle of writing the next attempt
+    with open(path, "ab") as file:
+        file.write(b"\0" * (RECORD.itemsize // 2))
+    with open(path + ".data", "ab") as file:
+        file.write(b"\0" * 3)
+
+    state.handle_click_on_node(state.hint())
+    with AttemptLog(path) as log:
+        log.record(2, state, [state.selected_path[0]], False)
+    records, data = load_attempts(path)
+    assert len(records) == 2
+    assert records["path"].tolist() == [0, 1]
+    assert data[records["offset"][1]] == state.selected_path[0]
+    assert rescore(records, data)["total"].tolist() == [0, state.total_path_weight]
+
+
+def write_attempts(path, writer, count):
+    """Records `count` attempts whose events identify the writer and the attempt. Runs in a worker process."""
+    state = engine.GameState()
+    state.setup_level(1, seed=writer)
+    with AttemptLog(path) as log:
+        for attempt in range(count):
+            log.record(writer, state, [writer * 1000 + attempt] * (1 + attempt % 5), False)
+
+
+def test_several_processes_share_a_log(tmp_path):
+    path = str(tmp_path / "attempts.log")
+    writers, count = 4, 200
+    with ProcessPoolExecutor(max_workers=writers) as executor:
+        list(executor.map(write_attempts, [path] * writers, range(1, writers + 1), [count] * writers))
+
+    records, data = load_attempts(path)
+    assert len(records) == writers * count
+    for record in records:
+        events = data[record["offset"]:record["offset"] + record["events"]]
+        attempt = int(events[0]) - record["level"] * 1000
+        assert 0 <= attempt < count and events.tolist() == [events[0]] * (1 + attempt % 5)
+    assert rescore(records, data)["valid"].all()
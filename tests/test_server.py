@@ -0,0 +1,124 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine
+from recording import UNDO, AttemptLog, load_attempts
+from server import Session, encode, serve_connection
+
+
+@pytest.fixture
+def executor():
+    # Threads instead of processes keep the tests fast; prepare_level runs the same either way
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_new_level_description(executor):
+    session = Session(executor)
+    info = run(session.handle({"cmd": "new", "level": 2, "seed": 7}))
+    level = engine.generate_level(2, 7)
+    assert info["level"] == 2 and info["seed"] == 7
+    assert (info["start"], info["end"]) == (level.start_node, level.end_node)
+    decoded = json.loads(encode(info))
+    assert decoded["edges"] == [list(edge) for edge in level.graph.edges]
+    assert decoded["weights"] == level.graph.weights.tolist()
+
+    info = run(session.handle({"cmd": "new", "nodes": 30, "graph": False}))
+    assert info["nodes"] == 30 and "edges" not in info
+
+
+@pytest.mark.parametrize("request_fields", [
+    {"level": -2}, {"level": 0}, {"level": True}, {"level": 1e400}, {"level": "3"}, {"level": 2 ** 40},
+    {"seed": -1}, {"seed": False}, {"seed": 2 ** 70}, {"seed": 1.5},
+    {"nodes": 1}, {"nodes": True}, {"nodes": 10 ** 6}, {"nodes": 20.0},
+])
+def test_bad_new_fields_leave_the_session_usable(executor, request_fields):
+    session = Session(executor)
+    with pytest.raises(ValueError):
+        run(session.handle({"cmd": "new", **request_fields}))
+    assert session.level == 1 and session.state is None
+    assert run(session.handle({"cmd": "new", "seed": 1}))["level"] == 1
+
+
+def test_commands_need_a_level(executor):
+    session = Session(executor)
+    for cmd in ("click", "undo", "hint", "finish"):
+        with pytest.raises(ValueError):
+            run(session.handle({"cmd": cmd, "node": 0}))
+    with pytest.raises(ValueError):
+        run(session.handle({"cmd": "fly"}))
+
+
+def test_click_undo_and_losing_finish(executor, tmp_path):
+    with AttemptLog(str(tmp_path / "attempts.log")) as log:
+        session = Session(executor, log)
+        info = run(session.handle({"cmd": "new", "level": 3, "seed": 4}))
+        for node in (True, -1, info["nodes"], 2.0, None):
+            with pytest.raises(ValueError):
+                run(session.handle({"cmd": "click", "node": node}))
+        assert session.events == []  # Rejected clicks are not recorded
+
+        hint = run(session.handle({"cmd": "hint"}))["node"]
+        response = run(session.handle({"cmd": "click", "node": hint}))
+        assert response["valid"] and response["deviation"] == 0
+        weight = response["total"]
+        undo = run(session.handle({"cmd": "undo"}))
+        assert undo["removed"] == [info["start"], hint] and undo["total"] == 0
+
+        response = run(session.handle({"cmd": "finish"}))  # An empty path loses and retries the level
+        assert not response["won"] and response["score"] == 0 and "next" not in response
+        assert session.level == 3 and session.state.selected_path == []
+        assert weight > 0
+
+    records, data = load_attempts(str(tmp_path / "attempts.log"))
+    assert len(records) == 1 and records["level"][0] == 3 and records["seed"][0] == 4
+    assert data[:2].tolist() == [hint, UNDO]
+
+
+def test_win_moves_on_to_the_next_level(executor):
+    session = Session(executor)
+    info = run(session.handle({"cmd": "new", "level": 1, "seed": 9, "graph": False}))
+    node = info["start"]
+    while node != info["end"]:
+        node = run(session.handle({"cmd": "hint"}))["node"]
+        assert run(session.handle({"cmd": "click", "node": node}))["valid"]
+    response = run(session.handle({"cmd": "finish"}))
+    assert response["won"] and response["total"] == response["shortest"]
+    assert response["score"] == engine.WIN_POINTS
+    assert response["next"]["level"] == 2 and session.level == 2
+    assert "edges" not in response["next"]
+    assert session.state.selected_path == [] and session.state.seed == response["next"]["seed"]
+
+
+def test_protocol_over_a_connection(executor):
+    async def talk():
+        server = await asyncio.start_server(lambda reader, writer: serve_connection(reader, writer, executor),
+                                            "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for line in (b'{"cmd": "new", "seed": 3, "id": 1}', b'not json', b'[1]', b'{"cmd": "new", "level": true}',
+                     b'{"cmd": "hint", "id": "h"}', b'{"cmd": "quit"}'):
+            writer.write(line + b"\n")
+            await writer.drain()
+            responses.append(await reader.readline())
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    new, not_json, not_object, bad_level, hint, quit_ = run(talk())
+    new = json.loads(new)
+    assert new["ok"] and new["id"] == 1 and new["seed"] == 3 and len(new["edges"]) == len(new["weights"])
+    assert not json.loads(not_json)["ok"] and not json.loads(not_object)["ok"]
+    assert not json.loads(bad_level)["ok"]
+    hint = json.loads(hint)
+    assert hint["ok"] and hint["id"] == "h" and isinstance(hint["node"], int)
+    assert quit_ == b""  # The server closes the connection
@@ -0,0 +1,115 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import engine
+from compact_graph import CompactGraph
+from solvers import SOLVERS, astar_heuristic, astar_path, repair_shortest_path_tree, shortest_path_tree, solve
+
+
+def random_graph(rng, nodes=None, extra_edges=None):
+    nodes = nodes or rng.randint(2, 120)
+    extra_edges = rng.randint(0, 2 * nodes) if extra_edges is None else extra_edges
+    return engine.generate_level_graph(0, seed=rng.randrange(2 ** 32), nodes_count=nodes, extra_edges=extra_edges)
+
+
+def check_tree(graph, root, distance, next_hop):
+    expected, _ = shortest_path_tree(graph, root)
+    assert distance.tolist() == expected.tolist()
+    for node in range(graph.number_of_nodes()):
+        if node == root or distance[node] < 0:
+            assert next_hop[node] == -1
+        else:
+            assert distance[node] == distance[next_hop[node]] + graph.weight(node, int(next_hop[node]))
+
+
+def test_shortest_path_tree_matches_networkx():
+    rng = random.Random(1)
+    for _ in range(20):
+        graph = random_graph(rng)
+        root = rng.randrange(graph.number_of_nodes())
+        distance, _ = shortest_path_tree(graph, root)
+        expected = nx.single_source_dijkstra_path_length(graph.to_networkx(), root)
+        assert distance.tolist() == [expected[node] for node in graph.nodes]
+
+
+def test_shortest_path_tree_marks_unreachable_nodes():
+    graph = CompactGraph(4, [0, 2], [1, 3], [5, 7])
+    distance, next_hop = shortest_path_tree(graph, 0)
+    assert distance.tolist() == [0, 5, -1, -1]
+    assert next_hop.tolist() == [-1, 0, -1, -1]
+
+
+def test_repair_matches_full_recompute():
+    rng = random.Random(2)
+    for _ in range(30):
+        graph = random_graph(rng)
+        root = rng.randrange(graph.number_of_nodes())
+        distance, next_hop = shortest_path_tree(graph, root)
+        for _ in range(100):
+            edge = rng.randrange(graph.number_of_edges())
+            u, v = int(graph.edge_u[edge]), int(graph.edge_v[edge])
+            old_weight = graph.set_weight(u, v, rng.randint(engine.MIN_WEIGHT, engine.MAX_WEIGHT))
+            changed = repair_shortest_path_tree(graph, distance, next_hop, u, v, old_weight)
+            assert changed == sorted(set(changed))
+            check_tree(graph, root, distance, next_hop)
+
+
+def test_repair_reports_changed_nodes():
+    # A path 0 - 1 - 2 - 3 with a detour 0 - 3
+    graph = CompactGraph(4, [0, 1, 2, 0], [1, 2, 3, 3], [1, 1, 1, 10])
+    distance, next_hop = shortest_path_tree(graph, 0)
+    old_weight = graph.set_weight(1, 2, 20)
+    assert repair_shortest_path_tree(graph, distance, next_hop, 1, 2, old_weight) == [2, 3]
+    assert distance.tolist() == [0, 1, 11, 10]
+    assert repair_shortest_path_tree(graph, distance, next_hop, 0, 1, graph.set_weight(0, 1, 1)) == []
+
+
+def test_live_traffic_keeps_the_game_state_consistent():
+    rng = np.random.default_rng(3)
+    state = engine.GameState()
+    state.setup_level(3, seed=11)
+    state.handle_click_on_node(state.hint())
+    for _ in range(50):
+        state.update_edge_weights(engine.traffic_changes(state.graph, rng))
+        check_tree(state.graph, state.end_node, state.distance_to_goal, state.next_hop)
+        path = [state.start_node] + state.selected_path
+        assert state.total_path_weight == sum(state.graph.weight(a, b) for a, b in zip(path, path[1:]))
+        assert state.shortest_path_length == state.distance_to_goal[state.start_node]
+
+
+@pytest.mark.parametrize("engine_name", sorted(SOLVERS))
+def test_engines_agree_with_networkx(engine_name):
+    rng = random.Random(4)
+    position_rng = np.random.default_rng(4)
+    for _ in range(20):
+        graph = random_graph(rng)
+        positions = position_rng.random((graph.number_of_nodes(), 2)) * 800
+        source, target = rng.randrange(graph.number_of_nodes()), rng.randrange(graph.number_of_nodes())
+        path, length = solve(graph, source, target, engine_name, positions)
+        assert length == nx.shortest_path_length(graph.to_networkx(), source, target, weight="weight")
+        assert path[0] == source and path[-1] == target
+        assert length == sum(graph.weight(a, b) for a, b in zip(path, path[1:]))
+
+
+def test_unreachable_target_raises():
+    graph = CompactGraph(4, [0, 2], [1, 3], [5, 7])
+    for name in SOLVERS:
+        with pytest.raises(ValueError):
+            solve(graph, 0, 3, name, np.zeros((4, 2)))
+
+
+def test_astar_heuristic_is_reused_until_a_weight_changes():
+    graph = CompactGraph(3, [0, 1, 0], [1, 2, 2], [4, 4, 10])
+    positions = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]])
+    scale, points = astar_heuristic(graph, positions)
+    assert scale == 4.0 and points == positions.tolist()
+    assert astar_heuristic(graph, positions)[1] is points  # Cached
+    assert astar_path(graph, 0, 2, positions) == ([0, 1, 2], 8)
+
+    # A cheaper edge lowers the scale; a stale heuristic would overestimate and miss the shortcut
+    graph.set_weight(0, 2, 1)
+    assert astar_heuristic(graph, positions)[0] == 0.5
+    assert astar_path(graph, 0, 2, positions) == ([0, 2], 1)
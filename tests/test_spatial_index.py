@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from spatial_index import GridIndex
+
+
+def random_points(count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(-50, 750, count), rng.uniform(-30, 530, count)])
+
+
+@pytest.mark.parametrize("cell_size", [3.0, 25.0, 400.0])
+@pytest.mark.parametrize("radius", [0.5, 10.0, 60.0])  # Smaller, about as large as and larger than a cell
+def test_radius_queries_match_brute_force(cell_size, radius):
+    points = random_points()
+    index = GridIndex(points, cell_size)
+    rng = np.random.default_rng(1)
+    for x, y in np.column_stack([rng.uniform(-80, 780, 200), rng.uniform(-60, 560, 200)]):
+        dist2 = ((points - [x, y]) ** 2).sum(axis=1)
+        found = index.query_radius((x, y), radius)
+        assert sorted(node for _, node in found) == np.flatnonzero(dist2 < radius ** 2).tolist()
+        assert [d for d, _ in found] == sorted(d for d, _ in found)  # Closest first
+        nearest = index.nearest((x, y), radius)
+        if found:
+            assert dist2[nearest] == dist2.min()
+        else:
+            assert nearest is None
+
+
+@pytest.mark.parametrize("cell_size", [3.0, 25.0, 400.0])
+def test_rect_queries_match_brute_force(cell_size):
+    points = random_points()
+    index = GridIndex(points, cell_size)
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        left, right = np.sort(rng.uniform(-100, 800, 2))
+        top, bottom = np.sort(rng.uniform(-100, 600, 2))
+        inside = ((points[:, 0] >= left) & (points[:, 0] <= right) &
+                  (points[:, 1] >= top) & (points[:, 1] <= bottom))
+        assert index.query_rect(left, top, right, bottom).tolist() == np.flatnonzero(inside).tolist()
+    assert index.query_rect(-1e6, -1e6, 1e6, 1e6).tolist() == list(range(len(points)))  # Walks occupied cells
+
+
+def test_points_on_cell_borders_and_empty_index():
+    index = GridIndex([(0, 0), (10, 10), (10, 0), (-10, -10)], 10)
+    assert index.query_rect(0, 0, 10, 10).tolist() == [0, 1, 2]  # Rectangle edges are included
+    assert index.nearest((10, 10), 0.1) == 1 and index.nearest((5, 5), 5) is None  # Strictly closer only
+    assert index.query_radius((0, 0), 10.5) == [(0.0, 0), (100.0, 2)]
+
+    empty = GridIndex(np.empty((0, 2)), 5)
+    assert empty.nearest((0, 0), 100) is None and len(empty.query_rect(-10, -10, 10, 10)) == 0